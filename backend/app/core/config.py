@@ -9,6 +9,9 @@ class Settings(BaseModel):
     environment: str = os.getenv("ENVIRONMENT", "local")
     debug: bool = os.getenv("DEBUG", "false").lower() == "true"
     redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    # Event-loop lag probe period and blocking-callback threshold (0 disables each)
+    loop_monitor_interval_ms: int = int(os.getenv("LOOP_MONITOR_INTERVAL_MS", "100"))
+    loop_block_threshold_ms: int = int(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
     database_url: str = os.getenv(
         "DATABASE_URL",
         # default dev DSN; docker-compose will override
@@ -0,0 +1,129 @@
+"""Event-loop lag and blocking-call detection.
+
+``LoopMonitor`` runs two probes:
+
+- a task on the event loop that sleeps ``interval`` seconds and observes how
+  late it wakes up in ``event_loop_lag_seconds`` (continuous signal);
+- a watchdog thread that notices when that task has not run for longer
+  than ``threshold`` (i.e. one callback is hogging the loop), then captures
+  the loop thread's stack while it is still blocked, counts it in
+  ``event_loop_blocked_total{route}`` and logs the stack. The route is the
+  matched FastAPI route template of the request being handled, found by
+  walking the blocked stack for its ASGI ``scope``; ``<background>`` when
+  the loop is blocked outside a request.
+
+The same module is used by backend, card-db and query. Start it from the
+lifespan (it needs the running loop) and stop it on shutdown.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from functools import lru_cache
+from types import FrameType
+
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND = "<background>"
+# Innermost frames logged per blocking report
+STACK_LIMIT = 30
+
+
+@lru_cache
+def loop_metrics(subsystem: str) -> tuple[Histogram, Counter]:
+    """Lag histogram and blocked-loop counter (created once per subsystem)."""
+    lag = Histogram(
+        "event_loop_lag_seconds",
+        "How late the event loop ran a timer scheduled for now",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+        namespace="grimoire",
+        subsystem=subsystem,
+    )
+    blocked = Counter(
+        "event_loop_blocked_total",
+        "Callbacks that held the event loop longer than the blocking threshold",
+        ["route"],
+        namespace="grimoire",
+        subsystem=subsystem,
+    )
+    return lag, blocked
+
+
+def _route_of(frame: FrameType | None) -> str:
+    """Route template of the request whose code is running in ``frame``."""
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") in ("http", "websocket"):
+            route = scope.get("route")
+            return getattr(route, "path", None) or "<unmatched>"
+        frame = frame.f_back
+    return BACKGROUND
+
+
+class LoopMonitor:
+    def __init__(self, subsystem: str, interval_secs: float, threshold_secs: float):
+        self.interval = interval_secs
+        self.threshold = threshold_secs
+        self.lag, self.blocked = loop_metrics(subsystem)
+        self._heartbeat = time.monotonic()
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._stop = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    def start(self):
+        """Start both probes; call from the event loop thread."""
+        if self.interval <= 0 or self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        if self.threshold > 0:
+            self._watchdog = threading.Thread(
+                target=self._watch, name="loop-monitor", daemon=True
+            )
+            self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _tick(self):
+        while True:
+            t0 = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.lag.observe(max(0.0, now - t0 - self.interval))
+            self._heartbeat = now
+
+    def _watch(self):
+        reported = None
+        while not self._stop.wait(min(self.interval, self.threshold) / 2):
+            beat = self._heartbeat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled <= self.threshold or beat == reported:
+                continue
+            reported = beat  # one report per blocking episode
+            frame = sys._current_frames().get(self._loop_thread)
+            route = _route_of(frame)
+            self.blocked.labels(route).inc()
+            stack = "".join(traceback.format_stack(frame, STACK_LIMIT)) if frame else ""
+            logger.warning(
+                "Event loop blocked for over %.0f ms (route %s); loop thread stack:\n%s",
+                stalled * 1000,
+                route,
+                stack,
+            )
+
+
+__all__ = ["LoopMonitor", "loop_metrics"]
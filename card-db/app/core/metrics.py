@@ -0,0 +1,117 @@
+"""HTTP request metrics labelled by the matched route template.
+
+``RouteMetricsMiddleware`` is a plain ASGI middleware. After the app has
+handled a request it reads the route FastAPI matched (``scope["route"]``,
+e.g. ``/decks/{deck_id}``) and the response status, so the ``path`` label is
+bounded by the route table and nothing is parsed per request. Requests that
+match no route are labelled ``<unmatched>``, unknown methods ``OTHER``.
+
+Multiprocess mode: when ``PROMETHEUS_MULTIPROC_DIR`` is set, every worker
+writes its samples to that directory and ``metrics_response`` aggregates
+all of them, so ``/metrics`` reports per-replica totals whichever worker
+serves the scrape. The directory must exist and be empty before the
+workers start (the Dockerfile does this).
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from functools import lru_cache
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+UNMATCHED = "<unmatched>"
+METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+
+@lru_cache
+def http_metrics(subsystem: str) -> tuple[Counter, Histogram]:
+    """Request counter and latency histogram (created once per subsystem)."""
+    count = Counter(
+        "requests_total",
+        "Total HTTP requests",
+        ["method", "path", "status"],
+        namespace="grimoire",
+        subsystem=subsystem,
+    )
+    latency = Histogram(
+        "request_latency_seconds",
+        "Request latency seconds",
+        ["method", "path"],
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+        namespace="grimoire",
+        subsystem=subsystem,
+    )
+    return count, latency
+
+
+class RouteMetricsMiddleware:
+    def __init__(self, app: ASGIApp, subsystem: str):
+        self.app = app
+        self.count, self.latency = http_metrics(subsystem)
+        # Labelled children, memoized: label lookups take a lock in the client
+        self._children: dict[tuple[str, str, int], tuple] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED)
+            method = scope["method"] if scope["method"] in METHODS else "OTHER"
+            count, latency = self._child(method, path, status)
+            count.inc()
+            latency.observe(time.perf_counter() - start)
+
+    def _child(self, method: str, path: str, status: int) -> tuple:
+        key = (method, path, status)
+        child = self._children.get(key)
+        if child is None:
+            child = (
+                self.count.labels(method, path, str(status)),
+                self.latency.labels(method, path),
+            )
+            self._children[key] = child
+        return child
+
+
+def metrics_response() -> Response:
+    """Prometheus exposition of this process, or of all workers in multiprocess mode."""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_worker_dead():
+    """Drop this worker's live-gauge files on shutdown (multiprocess mode only)."""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(os.getpid())
@@ -28,6 +28,7 @@ IMAGE_FETCH_LATENCY = Histogram(
 IMAGE_CIRCUIT_STATE = Gauge(
     "image_circuit_open",
     "1 if circuit breaker open else 0",
+    multiprocess_mode="livemax",  # open in any live worker
     namespace="grimoire",
     subsystem=settings.app_name,
 )
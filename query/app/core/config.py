@@ -12,9 +12,56 @@ class Settings(BaseModel):
     app_version: str = os.getenv("APP_VERSION", "0.1.0")
     redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     cache_ttl_secs: int = int(os.getenv("CACHE_TTL_SECS", "1800"))
+    # Popularity-aware TTL: each Redis hit slides an entry's TTL to
+    # base + hits * per-hit bonus, capped at the max
+    cache_ttl_per_hit_secs: int = int(os.getenv("CACHE_TTL_PER_HIT_SECS", "600"))
+    cache_ttl_max_secs: int = int(os.getenv("CACHE_TTL_MAX_SECS", "86400"))
+    # After the parser fingerprint changes, re-parse this many of the previous
+    # namespace's hottest texts (0 disables) at most this many per second
+    reparse_top_n: int = int(os.getenv("REPARSE_TOP_N", "1000"))
+    reparse_rps: float = float(os.getenv("REPARSE_RPS", "2"))
+    # In-process L1 in front of Redis for IR/response entries (0 size disables)
+    l1_cache_size: int = int(os.getenv("L1_CACHE_SIZE", "10000"))
+    l1_cache_ttl_secs: float = float(os.getenv("L1_CACHE_TTL_SECS", "60"))
+    # Cached IR codec: zlib-compress encoded payloads at least this large (0 = never)
+    ir_cache_compress_min_bytes: int = int(
+        os.getenv("IR_CACHE_COMPRESS_MIN_BYTES", "512")
+    )
+    # LLM retry budget: one deadline per request, jittered backoff, hedging at p95
+    llm_budget_secs: float = float(os.getenv("LLM_BUDGET_SECS", "12"))
+    llm_max_attempts: int = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+    llm_backoff_base_ms: int = int(os.getenv("LLM_BACKOFF_BASE_MS", "200"))
+    llm_hedge: bool = os.getenv("LLM_HEDGE", "true").lower() == "true"
+    llm_hedge_min_samples: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    # OpenAI circuit breaker: consecutive provider failures to open, seconds before a probe
+    llm_circuit_threshold: int = int(os.getenv("LLM_CIRCUIT_THRESHOLD", "5"))
+    llm_circuit_open_seconds: int = int(os.getenv("LLM_CIRCUIT_OPEN_SECONDS", "30"))
+    # Batch endpoint: max texts per request and concurrent LLM calls per batch
+    batch_max_items: int = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+    batch_llm_concurrency: int = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))
+    # Rule-based fast path that answers formulaic queries without the LLM
+    enable_fastpath: bool = os.getenv("ENABLE_FASTPATH", "true").lower() == "true"
+    # Single-flight coalescing: cross-replica lease lifetime and follower poll interval
+    parse_lease_ms: int = int(os.getenv("PARSE_LEASE_MS", "30000"))
+    parse_lease_poll_ms: int = int(os.getenv("PARSE_LEASE_POLL_MS", "100"))
     allowed_origins: str = os.getenv("ALLOWED_ORIGINS", "*")
+    # Event-loop lag probe period and blocking-callback threshold (0 disables each)
+    loop_monitor_interval_ms: int = int(os.getenv("LOOP_MONITOR_INTERVAL_MS", "100"))
+    loop_block_threshold_ms: int = int(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+    # Shared secret for /admin endpoints (X-Admin-Token); empty disables them
+    admin_token: str = os.getenv("ADMIN_TOKEN", "")
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
     openai_model: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    # Override to target a compatible endpoint, e.g. utils/mock-openai.py for load tests
+    openai_base_url: str | None = os.getenv("OPENAI_BASE_URL") or None
+    # Shared async OpenAI client: per-request timeout and connection pool size
+    openai_timeout_secs: float = float(os.getenv("OPENAI_TIMEOUT_SECS", "20"))
+    openai_max_connections: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "50"))
+    # Extra/overridden USD per-1M-token prices: {"model": [input, cached, output]}
+    llm_pricing_json: str = os.getenv("LLM_PRICING_JSON", "")
+    # Few-shot examples picked per request from the pool by lexical similarity,
+    # appended after the static CORE_FEW_SHOT prefix (0 = core only)
+    few_shot_k: int = int(os.getenv("FEW_SHOT_K", "4"))
     # Tag candidate / fuzzy matching feature flags & tuning
     enable_tag_candidates: bool = os.getenv("ENABLE_TAG_CANDIDATES", True)
     tags_max_art: int = int(os.getenv("TAGS_MAX_ART", "15"))
@@ -23,6 +70,9 @@ class Settings(BaseModel):
         os.getenv("TAGS_THRESHOLD_ART", "70")
     )  # 0-100 fuzzy score
     tags_threshold_oracle: int = int(os.getenv("TAGS_THRESHOLD_ORACLE", "70"))
+    # Tag candidate cache: per-worker LRU entries, shared Redis entry TTL
+    tag_cache_size: int = int(os.getenv("TAG_CACHE_SIZE", "4096"))
+    tag_cache_ttl_secs: int = int(os.getenv("TAG_CACHE_TTL_SECS", "86400"))
 
 
 @lru_cache(maxsize=1)
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Response
@@ -14,7 +15,13 @@ from app.core.errors import (
     validation_exception_handler,
     runtime_exception_handler,
 )
-from app.services.cache import init_redis
+from app.core.loop_monitor import LoopMonitor
+from app.services import reparse, warmup
+from app.services import cache
+from app.services.cache import init_redis, tag_reload_messages
+from app.services.llm import close_client
+from app.services.tag_index import load_index, reload_index
+from app.routers.admin import router as admin_router
 from app.routers.health import router as health_router
 from app.routers.nlq import router as nlq_router
 
@@ -23,15 +30,66 @@ logging.basicConfig(
 )
 logger = logging.getLogger("grimoireml-query")
 
+loop_monitor = LoopMonitor(
+    "query",
+    settings.loop_monitor_interval_ms / 1000,
+    settings.loop_block_threshold_ms / 1000,
+)
+
+
+async def follow_tag_reloads():
+    """Hot-reload the tag index whenever any worker announces a new one."""
+    while True:
+        try:
+            async for digest in tag_reload_messages():
+                if digest != load_index().digest:
+                    await asyncio.to_thread(reload_index)
+                    # New tag set, new parser namespace
+                    reparse.schedule()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:  # noqa
+            logger.warning("Tag reload subscription failed, retrying: %s", e)
+            await asyncio.sleep(5)
+
+
+async def follow_cache_invalidations():
+    """Drop L1 entries that another worker has rewritten in Redis."""
+    while True:
+        try:
+            async for keys in cache.invalidation_messages():
+                cache.l1.discard(keys)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:  # noqa
+            logger.warning("Cache invalidation subscription failed, retrying: %s", e)
+            await asyncio.sleep(1)
+
+
+async def warm_then_reparse():
+    await warmup.run()
+    if warmup.state.ready:
+        await reparse.run_safely()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # type: ignore[override]
+    loop_monitor.start()
     try:
-        await init_redis()
+        await warmup.stage("redis", init_redis)
     except Exception as e:  # noqa
         logger.error("Failed to connect to Redis: %s", e)
         raise
+    # Serve /health while priming; /health/ready flips once warmup is done
+    warming = asyncio.create_task(warm_then_reparse())
+    reloads = asyncio.create_task(follow_tag_reloads())
+    invalidations = asyncio.create_task(follow_cache_invalidations())
     yield
+    warming.cancel()
+    reloads.cancel()
+    invalidations.cancel()
+    await close_client()
+    loop_monitor.stop()
 
 
 app = FastAPI(
@@ -57,6 +115,7 @@ app.add_exception_handler(Exception, runtime_exception_handler)
 # Routers
 app.include_router(health_router)
 app.include_router(nlq_router)
+app.include_router(admin_router)
 
 
 @app.get("/metrics", include_in_schema=False)
@@ -166,3 +166,29 @@ class ParseResponse(BaseModel):
             ]
         }
     }
+
+
+class BatchParseRequest(BaseModel):
+    texts: List[str] = Field(min_length=1)
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "texts": [
+                        "mono white angels mv<=5 legal commander",
+                        "blue instant draw spells cmc 3 or less released after 2021",
+                    ]
+                }
+            ]
+        }
+    }
+
+
+class BatchParseResponse(BaseModel):
+    results: list[ParseResponse]  # same order as request texts
+
+
+class VariantCount(BaseModel):
+    text: str  # canonical text
+    variants: int  # distinct raw spellings observed (approximate)
@@ -0,0 +1,57 @@
+"""Operational endpoints (guarded by ``ADMIN_TOKEN``)."""
+
+from __future__ import annotations
+
+import asyncio
+import hmac
+import logging
+from fastapi import APIRouter, Header, HTTPException
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.services import cache, reparse
+from app.services.tag_index import reload_index
+from app.services.tag_snapshot import ensure_snapshot
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+logger = logging.getLogger(__name__)
+
+
+class TagReloadResponse(BaseModel):
+    version: int
+    digest: str
+    art_tags: int
+    oracle_tags: int
+    snapshot_rebuilt: bool
+
+
+def _check_token(token: str | None):
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="admin endpoints disabled")
+    if not token or not hmac.compare_digest(token, settings.admin_token):
+        raise HTTPException(status_code=401, detail="invalid admin token")
+
+
+@router.post(
+    "/tags/reload",
+    response_model=TagReloadResponse,
+    summary="Recompile the tag snapshot if stale and hot-reload it in every worker",
+)
+async def reload_tags(x_admin_token: str | None = Header(default=None)):
+    _check_token(x_admin_token)
+    rebuilt = await asyncio.to_thread(ensure_snapshot)
+    idx = await asyncio.to_thread(reload_index)
+    # Other workers/replicas reload on the broadcast (this one skips its own)
+    await cache.publish_tag_reload(idx.digest)
+    reparse.schedule()
+    return TagReloadResponse(
+        version=idx.version,
+        digest=idx.digest,
+        art_tags=len(idx.art_tags),
+        oracle_tags=len(idx.oracle_tags),
+        snapshot_rebuilt=rebuilt,
+    )
+
+
+__all__ = ["router"]
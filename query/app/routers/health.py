@@ -4,8 +4,11 @@ from __future__ import annotations
 
 from datetime import datetime
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+from app.services import warmup
+
 router = APIRouter(prefix="/health", tags=["health"])
 
 
@@ -19,4 +22,25 @@ async def get_health():
     return HealthResponse(status="ok", timestamp=datetime.utcnow())
 
 
+class ReadinessResponse(BaseModel):
+    status: str  # ready | warming | failed
+    stages: dict[str, float]  # seconds per finished warmup stage
+    error: str | None = None
+
+
+@router.get(
+    "/ready",
+    response_model=ReadinessResponse,
+    summary="Readiness check (503 until startup warmup has finished)",
+    responses={503: {"model": ReadinessResponse}},
+)
+async def get_ready():
+    s = warmup.state
+    status = "ready" if s.ready else ("failed" if s.error else "warming")
+    body = ReadinessResponse(status=status, stages=s.stages, error=s.error)
+    if not s.ready:
+        return JSONResponse(status_code=503, content=body.model_dump())
+    return body
+
+
 __all__ = ["router"]
@@ -2,16 +2,33 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
 import time
-from fastapi import APIRouter
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from prometheus_client import Counter, Histogram
-from app.models import ParseRequest, ParseResponse
-from app.services import cache
+from app.models import (
+    BatchParseRequest,
+    BatchParseResponse,
+    ParseRequest,
+    ParseResponse,
+    QueryIR,
+    VariantCount,
+)
+from app.core.config import settings
+from app.services import cache, singleflight, usage
+from app.services.fastpath import fast_parse, fast_parse_partial
+from app.services.normalize import canonicalize
 from app.services.llm import parse_nl_query
-from app.services.compiler import compile_to_scryfall
+from app.services.tag_cache import cached_tag_candidates, cached_tag_candidates_many
+from app.services.compiler import compile_to_scryfall, decompile_scryfall
 
 router = APIRouter(prefix="/nlq", tags=["Parsing"])
 
+logger = logging.getLogger(__name__)
+
 PARSE_REQUESTS = Counter(
     "parse_requests_total",
     "Total /nlq/parse requests",
@@ -26,10 +43,24 @@ PARSE_LATENCY = Histogram(
     namespace="grimoire",
     subsystem="query",
 )
+BATCH_SIZE = Histogram(
+    "parse_batch_size",
+    "Texts per /nlq/parse:batch request",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500),
+    namespace="grimoire",
+    subsystem="query",
+)
 CACHE_IR_LOOKUPS = Counter(
     "cache_ir_lookups_total",
     "IR cache lookups",
-    ["result"],
+    ["result"],  # result: hit, previous (older parser namespace), miss
+    namespace="grimoire",
+    subsystem="query",
+)
+CANONICALIZED = Counter(
+    "canonicalized_requests_total",
+    "Requests whose text was changed by canonicalization",
+    ["changed"],
     namespace="grimoire",
     subsystem="query",
 )
@@ -42,41 +73,285 @@ WARNINGS_COUNT = Counter(
 )
 
 
+async def _resolve_ir_fast(text: str) -> tuple[QueryIR | None, str]:
+    """Resolve canonical ``text`` without the LLM: fast path, then IR cache.
+
+    Returns (ir or None, cache_state).
+    """
+    if settings.enable_fastpath:
+        ir = fast_parse(text)
+        if ir is not None:
+            return ir, "fastpath"
+    ir = await cache.get_ir_for_text(text)
+    if ir is not None:
+        CACHE_IR_LOOKUPS.labels("hit").inc()
+        return ir, "ir_hit"
+    # Parse from before the last parser change, until it is re-parsed
+    (ir,) = await cache.get_previous_irs([text])
+    if ir is not None:
+        CACHE_IR_LOOKUPS.labels("previous").inc()
+        return ir, "ir_previous"
+    CACHE_IR_LOOKUPS.labels("miss").inc()
+    return None, "miss"
+
+
+async def _resolve_ir_llm(text: str) -> tuple[QueryIR | None, list[str]]:
+    """LLM parse (coalesced); None when the retry budget was exhausted."""
+    ir, warnings_llm = await singleflight.parse_once(text, parse_nl_query)
+    for _ in warnings_llm:
+        WARNINGS_COUNT.labels("llm").inc()
+    return ir, warnings_llm
+
+
+async def _resolve_ir(text: str) -> tuple[QueryIR | None, str, list[str]]:
+    """Resolve a request to IR, falling back to the LLM on a miss.
+
+    Returns (ir or None if the LLM failed, cache_state, llm_warnings).
+    """
+    ir, cache_state = await _resolve_ir_fast(text)
+    if ir is not None:
+        return ir, cache_state, []
+    ir, warnings_llm = await _resolve_ir_llm(text)
+    return ir, cache_state, warnings_llm
+
+
+def _build_response(
+    ir: QueryIR | None, warnings: list[str], text: str = ""
+) -> ParseResponse:
+    if ir is None:
+        # LLM failed or circuit open: best-effort rule-based IR (never cached)
+        ir = fast_parse_partial(text) or QueryIR()
+    compiled, compiled_parts, comp_warnings = compile_to_scryfall(ir)
+    for _ in comp_warnings:
+        WARNINGS_COUNT.labels("compile").inc()
+    return ParseResponse(
+        ir=ir,
+        query=compiled,
+        query_parts=compiled_parts,
+        warnings=warnings + comp_warnings,
+    )
+
+
+async def _cache_response(text: str, ir: QueryIR | None, cache_state: str, body: str):
+    # Decompiled responses are keyed on raw syntax, not canonical text;
+    # previous-namespace IR must not pin a response in the new namespace
+    if ir is not None and cache_state not in ("decompiled", "ir_previous"):
+        await cache.cache_response(text, body)
+
+
 @router.post(
     "/parse", response_model=ParseResponse, summary="Parse natural language query"
 )
-async def parse_endpoint(req: ParseRequest):
+async def parse_endpoint(req: ParseRequest, background: BackgroundTasks):
     t0 = time.perf_counter()
+    llm_usage = usage.start_request()
     cache_state = "miss"
     status = "ok"
     warnings: list[str] = []
     try:
-        ir = await cache.get_ir_for_text(req.text)
+        text = canonicalize(req.text)
+        CANONICALIZED.labels(str(text != req.text).lower()).inc()
+        background.add_task(cache.record_variant, req.text, text)
+        # Scryfall syntax is quote and case sensitive: decompile the raw text
+        # before the response cache, which is keyed on canonical text
+        ir = decompile_scryfall(req.text)
         if ir is not None:
-            CACHE_IR_LOOKUPS.labels("hit").inc()
-            cache_state = "ir_hit"
+            cache_state = "decompiled"
         else:
-            CACHE_IR_LOOKUPS.labels("miss").inc()
-            ir, warnings_llm = parse_nl_query(req.text)
-            for _ in warnings_llm:
-                WARNINGS_COUNT.labels("llm").inc()
+            cached = await cache.get_response(text)
+            if cached is not None:
+                cache_state = "response_hit"
+                PARSE_REQUESTS.labels(cache_state, status).inc()
+                return Response(content=cached, media_type="application/json")
+            ir, cache_state, warnings_llm = await _resolve_ir(text)
             warnings.extend(warnings_llm)
-            await cache.cache_ir(req.text, ir)
-
-        compiled, compiled_parts, comp_warnings = compile_to_scryfall(ir)
-        for _ in comp_warnings:
-            WARNINGS_COUNT.labels("compile").inc()
-        warnings.extend(comp_warnings)
+        body = _build_response(ir, warnings, text).model_dump_json()
+        await _cache_response(text, ir, cache_state, body)
         PARSE_REQUESTS.labels(cache_state, status).inc()
-        return ParseResponse(
-            ir=ir, query=compiled, query_parts=compiled_parts, warnings=warnings
-        )
+        return Response(content=body, media_type="application/json")
     except Exception:  # noqa
         status = "error"
         PARSE_REQUESTS.labels(cache_state, status).inc()
         raise
     finally:
-        PARSE_LATENCY.observe(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - t0
+        PARSE_LATENCY.observe(elapsed)
+        _log_llm_usage("parse", cache_state, llm_usage, elapsed)
+
+
+def _log_llm_usage(
+    route: str, cache_state: str, llm_usage: usage.LLMUsage, elapsed: float
+):
+    # One line per request that reached the LLM, to tie latency to prompt size
+    if llm_usage.attempts:
+        logger.info(
+            "nlq %s cache_state=%s %s total_secs=%.3f",
+            route,
+            cache_state,
+            llm_usage.log_fields(),
+            elapsed,
+        )
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@router.post(
+    "/parse:stream",
+    summary="Parse natural language query, streaming stages as Server-Sent Events",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def parse_stream_endpoint(req: ParseRequest, background: BackgroundTasks):
+    """Stream parse stages as they become ready.
+
+    Events: ``candidates`` (tag candidates), ``provisional`` (rule-based partial
+    IR + query), ``final`` (``ParseResponse``), or ``error``. Requests resolved
+    without the LLM emit ``final`` only.
+    """
+    text = canonicalize(req.text)
+    CANONICALIZED.labels(str(text != req.text).lower()).inc()
+    background.add_task(cache.record_variant, req.text, text)
+
+    async def events():
+        t0 = time.perf_counter()
+        llm_usage = usage.start_request()
+        cache_state = "miss"
+        try:
+            # Raw Scryfall syntax first, as in parse_endpoint
+            ir = decompile_scryfall(req.text)
+            if ir is not None:
+                cache_state = "decompiled"
+            else:
+                cached = await cache.get_response(text)
+                if cached is not None:
+                    cache_state = "response_hit"
+                    yield _sse("final", cached)
+                    PARSE_REQUESTS.labels(cache_state, "ok").inc()
+                    return
+                ir, cache_state = await _resolve_ir_fast(text)
+            if ir is None:
+                if settings.enable_tag_candidates:
+                    art, oracle = await cached_tag_candidates(text)
+                    yield _sse(
+                        "candidates",
+                        json.dumps({"art_tags": art, "oracle_tags": oracle}),
+                    )
+                provisional = fast_parse_partial(text)
+                if provisional is not None:
+                    yield _sse(
+                        "provisional",
+                        _build_response(provisional, []).model_dump_json(),
+                    )
+                ir, warnings_llm = await _resolve_ir_llm(text)
+            else:
+                warnings_llm = []
+            body = _build_response(ir, warnings_llm, text).model_dump_json()
+            # Before the last event: a client that disconnects after it
+            # would otherwise cancel the write
+            await _cache_response(text, ir, cache_state, body)
+            yield _sse("final", body)
+            PARSE_REQUESTS.labels(cache_state, "ok").inc()
+        except Exception:  # noqa
+            logger.exception("Streaming parse failed")
+            PARSE_REQUESTS.labels(cache_state, "error").inc()
+            yield _sse("error", json.dumps({"error": "internal_error"}))
+        finally:
+            _log_llm_usage("stream", cache_state, llm_usage, time.perf_counter() - t0)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post(
+    "/parse:batch",
+    response_model=BatchParseResponse,
+    summary="Parse many natural language queries in one request",
+)
+async def parse_batch_endpoint(req: BatchParseRequest):
+    if len(req.texts) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"batch exceeds {settings.batch_max_items} texts",
+        )
+    BATCH_SIZE.observe(len(req.texts))
+    t0 = time.perf_counter()
+    llm_usage = usage.start_request()
+    canon = [canonicalize(t) for t in req.texts]
+    resolved: dict[str, tuple[QueryIR | None, list[str]]] = {}
+
+    # Deterministic paths first; no I/O
+    pending: list[str] = []
+    for raw, text in zip(req.texts, canon):
+        if text in resolved:
+            continue
+        ir = decompile_scryfall(raw)
+        if ir is None and settings.enable_fastpath:
+            ir = fast_parse(text)
+        if ir is not None:
+            resolved[text] = (ir, [])
+        elif text not in pending:
+            pending.append(text)
+
+    # All cache lookups in one round-trip (plus one for the previous namespace)
+    hits = await cache.get_irs_for_texts(pending)
+    for text, ir in zip(pending, hits):
+        if ir is not None:
+            CACHE_IR_LOOKUPS.labels("hit").inc()
+            resolved[text] = (ir, [])
+    pending = [text for text, ir in zip(pending, hits) if ir is None]
+    previous = await cache.get_previous_irs(pending)
+    misses: list[str] = []
+    for text, ir in zip(pending, previous):
+        CACHE_IR_LOOKUPS.labels("previous" if ir is not None else "miss").inc()
+        if ir is not None:
+            resolved[text] = (ir, [])
+        else:
+            misses.append(text)
+
+    # Tag candidates for every miss: one cache round-trip, one scoring pass
+    candidates: list = [None] * len(misses)
+    if misses and settings.enable_tag_candidates:
+        candidates = await cached_tag_candidates_many(misses)
+
+    # Deduped misses fan out to the LLM under a concurrency cap
+    sem = asyncio.Semaphore(settings.batch_llm_concurrency)
+
+    async def _parse(text: str, cands) -> tuple[QueryIR | None, list[str]]:
+        async with sem:
+            return await parse_nl_query(text, cands)
+
+    parsed = await asyncio.gather(*(_parse(t, c) for t, c in zip(misses, candidates)))
+    fresh: dict[str, QueryIR] = {}
+    for text, (ir, warnings_llm) in zip(misses, parsed):
+        for _ in warnings_llm:
+            WARNINGS_COUNT.labels("llm").inc()
+        if ir is not None:
+            fresh[text] = ir
+        resolved[text] = (ir, warnings_llm)
+    await cache.cache_irs(fresh)
+    _log_llm_usage("batch", "miss", llm_usage, time.perf_counter() - t0)
+
+    return BatchParseResponse(
+        results=[
+            _build_response(resolved[text][0], list(resolved[text][1]), text)
+            for text in canon
+        ]
+    )
+
+
+@router.get(
+    "/variants",
+    response_model=list[VariantCount],
+    summary="Canonical texts with the most distinct raw spellings",
+)
+async def variants_endpoint(limit: int = 20):
+    rows = await cache.top_variant_counts(limit)
+    return [VariantCount(text=text, variants=n) for text, n in rows]
 
 
 __all__ = ["router"]
@@ -0,0 +1,104 @@
+"""Circuit breaker guarding the OpenAI dependency.
+
+Built on the same ``circuitbreaker`` package card-db uses for its image
+origin. Provider-side failures (timeouts, connection errors, 5xx, rate
+limits) count towards the threshold; bad output from a healthy provider does
+not. Once the recovery timeout elapses the breaker goes half-open and lets a
+single probe call through: success closes it, failure re-opens it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+from circuitbreaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitBreakerError,
+)
+from openai import (
+    APIConnectionError,
+    InternalServerError,
+    RateLimitError,
+)
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+
+LLM_CIRCUIT_STATE = Gauge(
+    "llm_circuit_state",
+    "1 for the current LLM circuit breaker state, 0 for the others",
+    ["state"],
+    namespace="grimoire",
+    subsystem="query",
+)
+LLM_CIRCUIT_TRANSITIONS = Counter(
+    "llm_circuit_transitions_total",
+    "LLM circuit breaker state transitions",
+    ["from_state", "to_state"],
+    namespace="grimoire",
+    subsystem="query",
+)
+
+_STATES = (STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN)
+
+
+class LLMCircuitBreaker(CircuitBreaker):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._probe_in_flight = False
+        self._last_seen = STATE_CLOSED
+        self._export(STATE_CLOSED)
+
+    @property
+    def opened(self):
+        # Half-open admits exactly one probe; everyone else still sees "open"
+        state = self.observe()
+        if state == STATE_HALF_OPEN:
+            return self._probe_in_flight
+        return state == STATE_OPEN
+
+    def __enter__(self):
+        if self.state == STATE_HALF_OPEN:
+            self._probe_in_flight = True
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc_value, _traceback):
+        try:
+            if exc_type is not None and issubclass(exc_type, asyncio.CancelledError):
+                # Cancelled (e.g. losing hedge): neither success nor failure
+                return False
+            return super().__exit__(exc_type, exc_value, _traceback)
+        finally:
+            self._probe_in_flight = False
+            self.observe()
+
+    def observe(self) -> str:
+        """Current state; records a transition if it changed since last seen."""
+        state = self.state
+        if state != self._last_seen:
+            LLM_CIRCUIT_TRANSITIONS.labels(self._last_seen, state).inc()
+            self._last_seen = state
+            self._export(state)
+        return state
+
+    @staticmethod
+    def _export(current: str):
+        for s in _STATES:
+            LLM_CIRCUIT_STATE.labels(s).set(1 if s == current else 0)
+
+
+llm_breaker = LLMCircuitBreaker(
+    failure_threshold=settings.llm_circuit_threshold,
+    recovery_timeout=settings.llm_circuit_open_seconds,
+    expected_exception=(
+        APIConnectionError,  # includes APITimeoutError
+        InternalServerError,
+        RateLimitError,
+    ),
+    name="openai",
+)
+
+__all__ = ["llm_breaker", "LLMCircuitBreaker", "CircuitBreakerError"]
@@ -1,18 +1,55 @@
-"""Redis cache helpers (moved under services)."""
+"""Redis cache helpers (moved under services).
+
+IR and response entries are read through a bounded per-worker L1 (LRU with
+a TTL) in front of Redis. Every write publishes the written keys on
+``INVALIDATE_CHANNEL`` in the same pipeline, and workers drop those keys
+from their L1 (see ``invalidation_messages``), so a rewrite on any replica
+is seen everywhere. Redis errors on these paths degrade to L1-only
+instead of failing the request.
+"""
 
 from __future__ import annotations
 
 import hashlib
 import json
 import logging
+import os
+import socket
+import time
+from collections import OrderedDict
+
 import redis.asyncio as redis
+from prometheus_client import Counter
 
 from app.core.config import settings
 from app.models import QueryIR
+from .compiler import COMPILER_VERSION
+from .ir_codec import decode_ir, encode_ir
+from .tag_index import load_index
 
 logger = logging.getLogger(__name__)
 
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "IR/response cache lookups per tier",
+    ["kind", "tier", "result"],  # tier: l1, redis; result: hit, miss, error
+    namespace="grimoire",
+    subsystem="query",
+)
+L1_EVICTIONS = Counter(
+    "cache_l1_evictions_total",
+    "Entries dropped from the in-process L1 cache",
+    ["reason"],  # reason: size, ttl, invalidated
+    namespace="grimoire",
+    subsystem="query",
+)
+
+# Redis failures that should degrade to L1-only rather than fail a request
+REDIS_ERRORS = (redis.RedisError, OSError)
+
 _redis: redis.Redis | None = None
+# Same server without response decoding, for binary (IR codec) values
+_redis_bytes: redis.Redis | None = None
 
 
 async def init_redis() -> redis.Redis:
@@ -26,50 +63,529 @@ async def init_redis() -> redis.Redis:
     return _redis
 
 
-def text_key(text: str) -> str:
-    return "nlq:" + hashlib.sha1(text.encode()).hexdigest()
+async def init_redis_bytes() -> redis.Redis:
+    global _redis_bytes
+    if _redis_bytes is None:
+        _redis_bytes = redis.from_url(settings.redis_url, decode_responses=False)
+    return _redis_bytes
 
 
-def ir_key(ir_json: str) -> str:
-    return "ir:" + hashlib.sha1(ir_json.encode()).hexdigest()
+def parser_version() -> str:
+    """Fingerprint of the current LLM parser; namespaces IR and response keys."""
+    # Deferred import: llm -> tag_cache -> this module
+    from .llm import parser_fingerprint
 
+    return parser_fingerprint()
 
-async def get_ir_for_text(text: str) -> QueryIR | None:
+
+def text_key(text: str, version: str | None = None) -> str:
+    version = version or parser_version()
+    return f"nlq:p{version}:" + hashlib.sha1(text.encode()).hexdigest()
+
+
+def hot_key(version: str) -> str:
+    """Sorted set of canonical texts by Redis IR/response hits within one namespace."""
+    return f"nlq:hot:p{version}"
+
+
+PARSER_VERSIONS_KEY = "nlq:parsers"
+_previous_versions: dict[str, str | None] = {}
+
+
+async def previous_parser_version() -> str | None:
+    """The namespace in use before the current one (None if there was none).
+
+    Versions are recorded with their first-seen time; the answer is memoized
+    per current version, so it is stable for the life of a namespace.
+    """
+    current = parser_version()
+    if current not in _previous_versions:
+        r = await init_redis()
+        await r.zadd(PARSER_VERSIONS_KEY, {current: time.time()}, nx=True)
+        newest = await r.zrevrange(PARSER_VERSIONS_KEY, 0, 1)
+        older = [v for v in newest if v != current]
+        _previous_versions[current] = older[0] if older else None
+    return _previous_versions[current]
+
+
+VARIANT_COUNTS_KEY = "nlq:variant_counts"
+
+
+def variants_key(text: str) -> str:
+    return "nlqv:" + hashlib.sha1(text.encode()).hexdigest()
+
+
+async def record_variant(raw: str, canonical: str):
+    """Track distinct raw spellings seen for a canonical text.
+
+    A HyperLogLog per canonical text dedupes raw variants; when a new one is
+    seen the canonical text's score in a sorted set is bumped, so the top of
+    that set shows which keys gained most from canonicalization.
+    """
+    try:
+        r = await init_redis()
+        if await r.pfadd(variants_key(canonical), raw):
+            await r.zincrby(VARIANT_COUNTS_KEY, 1, canonical)
+    except REDIS_ERRORS as e:
+        logger.warning("Failed to record variant: %s", e)
+
+
+async def top_variant_counts(limit: int = 20) -> list[tuple[str, int]]:
+    r = await init_redis()
+    rows = await r.zrevrange(VARIANT_COUNTS_KEY, 0, limit - 1, withscores=True)
+    return [(text, int(score)) for text, score in rows]
+
+
+def lease_key(text: str) -> str:
+    return "lease:" + text_key(text)
+
+
+# Release only if we still own the lease (it may have expired and been re-taken)
+_RELEASE_LEASE_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+async def acquire_lease(text: str, token: str) -> bool:
     r = await init_redis()
-    raw = await r.get(text_key(text))
+    ok = await r.set(lease_key(text), token, nx=True, px=settings.parse_lease_ms)
+    return bool(ok)
+
+
+async def release_lease(text: str, token: str):
+    try:
+        r = await init_redis()
+        await r.eval(_RELEASE_LEASE_LUA, 1, lease_key(text), token)
+    except REDIS_ERRORS as e:
+        # Left to expire after PARSE_LEASE_MS
+        logger.warning("Failed to release parse lease: %s", e)
+
+
+async def lease_held(text: str) -> bool:
+    """Whether another parse holds ``text``'s lease (False if Redis is down)."""
+    try:
+        r = await init_redis()
+        return bool(await r.exists(lease_key(text)))
+    except REDIS_ERRORS as e:
+        logger.warning("Failed to check parse lease: %s", e)
+        return False
+
+
+def reparse_lock_key(version: str) -> str:
+    return f"lock:reparse:p{version}"
+
+
+# Extend only if we still own the lock
+_EXTEND_LOCK_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+async def acquire_reparse_lock(version: str, token: str, ttl_ms: int) -> bool:
+    """One replica re-parses into a namespace at a time."""
+    r = await init_redis()
+    ok = await r.set(reparse_lock_key(version), token, nx=True, px=ttl_ms)
+    return bool(ok)
+
+
+async def extend_reparse_lock(version: str, token: str, ttl_ms: int) -> bool:
+    r = await init_redis()
+    key = reparse_lock_key(version)
+    return bool(await r.eval(_EXTEND_LOCK_LUA, 1, key, token, ttl_ms))
+
+
+async def release_reparse_lock(version: str, token: str):
+    r = await init_redis()
+    await r.eval(_RELEASE_LEASE_LUA, 1, reparse_lock_key(version), token)
+
+
+class L1Cache:
+    """Bounded LRU of raw cached values; entries expire ``ttl`` seconds after write."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, str | bytes]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> str | bytes | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if expires <= time.monotonic():
+            del self._data[key]
+            L1_EVICTIONS.labels("ttl").inc()
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: str | bytes):
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            L1_EVICTIONS.labels("size").inc()
+
+    def discard(self, keys: list[str]):
+        for key in keys:
+            if self._data.pop(key, None) is not None:
+                L1_EVICTIONS.labels("invalidated").inc()
+
+    def clear(self):
+        L1_EVICTIONS.labels("invalidated").inc(len(self._data))
+        self._data.clear()
+
+
+l1 = L1Cache(settings.l1_cache_size, settings.l1_cache_ttl_secs)
+
+INVALIDATE_CHANNEL = "nlq:cache:invalidate"
+
+
+def _origin() -> str:
+    # Per process, computed at call time so forked workers differ
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def _client(binary: bool) -> redis.Redis:
+    return await (init_redis_bytes() if binary else init_redis())
+
+
+def hits_key(key: str) -> str:
+    return "hits:" + key
+
+
+def ttl_for_hits(hits: int) -> int:
+    """Entry TTL after ``hits`` Redis hits: base + per-hit bonus, capped."""
+    ttl = settings.cache_ttl_secs + hits * settings.cache_ttl_per_hit_secs
+    return max(settings.cache_ttl_secs, min(ttl, settings.cache_ttl_max_secs))
+
+
+# GET each key; on a hit bump its text's hit counter and slide the TTL of
+# the key, the counter and the text's other entry (IR <-> response) to
+# base + hits * per_hit (capped). KEYS: key1, hits1, other1, key2, ...
+# ARGV: base, per_hit, max. One round-trip, same shape as MGET.
+# With one member per key appended to ARGV, the last KEYS entry is a sorted
+# set in which each hit key's member is incremented (hot-key tracking).
+_GET_TOUCH_LUA = """
+local out = {}
+local tracked = #ARGV > 3
+local last = tracked and #KEYS - 1 or #KEYS
+for i = 1, last, 3 do
+    local value = redis.call('get', KEYS[i])
+    if value then
+        local hits = redis.call('incr', KEYS[i + 1])
+        local ttl = tonumber(ARGV[1]) + hits * tonumber(ARGV[2])
+        ttl = math.max(tonumber(ARGV[1]), math.min(ttl, tonumber(ARGV[3])))
+        redis.call('expire', KEYS[i], ttl)
+        redis.call('expire', KEYS[i + 1], ttl)
+        redis.call('expire', KEYS[i + 2], ttl)
+        if tracked then
+            redis.call('zincrby', KEYS[#KEYS], 1, ARGV[3 + (i + 2) / 3])
+            redis.call('expire', KEYS[#KEYS], ARGV[3])
+        end
+    end
+    out[#out + 1] = value
+end
+return out
+"""
+
+
+async def _get_touch(
+    r: redis.Redis,
+    groups: list[tuple[str, str, str]],
+    hot: tuple[str, list[str]] | None = None,
+) -> list:
+    script = r.register_script(_GET_TOUCH_LUA)
+    all_keys = [k for group in groups for k in group]
+    args = [
+        settings.cache_ttl_secs,
+        settings.cache_ttl_per_hit_secs,
+        settings.cache_ttl_max_secs,
+    ]
+    if hot is not None:
+        all_keys.append(hot[0])
+        args.extend(hot[1])
+    return await script(keys=all_keys, args=args)
+
+
+async def _get_many(
+    kind: str, texts: list[str], version: str, track: bool = False
+) -> list:
+    """Raw ``kind`` ("ir" or "response") values for ``texts``: L1 first, then Redis.
+
+    A text's IR and response entries share one hit counter (keyed by the IR
+    key): a Redis hit on either counts towards the text's popularity and
+    slides the TTL of both, so a text served from the response cache keeps
+    its IR. L1 hits don't touch Redis, so a hot key is refreshed at most
+    about once per worker per ``L1_CACHE_TTL_SECS``. With ``track``, Redis
+    hits also increment the text in ``hot_key(version)``.
+    """
+    binary = kind == "ir"
+    ir_keys = [text_key(t, version) for t in texts]
+    resp_keys = [response_key(t, version) for t in texts]
+    keys, others = (ir_keys, resp_keys) if binary else (resp_keys, ir_keys)
+    out = [l1.get(k) for k in keys]
+    missing = [i for i, raw in enumerate(out) if raw is None]
+    CACHE_LOOKUPS.labels(kind, "l1", "hit").inc(len(keys) - len(missing))
+    CACHE_LOOKUPS.labels(kind, "l1", "miss").inc(len(missing))
+    if not missing:
+        return out
+    try:
+        r = await _client(binary)
+        groups = [(keys[i], hits_key(ir_keys[i]), others[i]) for i in missing]
+        tracked = (hot_key(version), [texts[i] for i in missing]) if track else None
+        raws = await _get_touch(r, groups, tracked)
+    except REDIS_ERRORS as e:
+        CACHE_LOOKUPS.labels(kind, "redis", "error").inc(len(missing))
+        logger.warning("Redis read failed, serving L1 only: %s", e)
+        return out
+    for i, raw in zip(missing, raws):
+        CACHE_LOOKUPS.labels(kind, "redis", "hit" if raw else "miss").inc()
+        if raw:
+            l1.put(keys[i], raw)
+            out[i] = raw
+    return out
+
+
+async def _set_many(
+    items: dict, binary: bool = False, hits: dict[str, int] | None = None
+):
+    """Write through L1 and Redis; other workers are told to drop these keys.
+
+    ``hits`` seeds the popularity of keys (e.g. from the request log), which
+    sets their initial TTL accordingly.
+    """
+    hits = hits or {}
+    if not items:
+        return
+    for key, raw in items.items():
+        l1.put(key, raw)
+    message = json.dumps({"origin": _origin(), "keys": list(items)})
+    try:
+        r = await _client(binary)
+        async with r.pipeline(transaction=False) as pipe:
+            for key, raw in items.items():
+                ttl = ttl_for_hits(hits.get(key, 0))
+                pipe.set(key, raw, ex=ttl)
+                if key in hits:
+                    pipe.set(hits_key(key), hits[key], ex=ttl)
+            pipe.publish(INVALIDATE_CHANNEL, message)
+            await pipe.execute()
+    except REDIS_ERRORS as e:
+        logger.warning("Redis write failed, kept in L1 only: %s", e)
+
+
+def _load_ir(raw: bytes | None) -> QueryIR | None:
     if raw:
         try:
-            data = json.loads(raw)
-            return QueryIR.model_validate(data)
+            return decode_ir(raw)
         except Exception:  # noqa
             logger.warning("Failed to deserialize IR from cache")
     return None
 
 
+async def _get_irs(texts: list[str], version: str) -> list[QueryIR | None]:
+    raws = await _get_many("ir", texts, version, track=True)
+    return [_load_ir(raw) for raw in raws]
+
+
+async def get_ir_for_text(text: str) -> QueryIR | None:
+    (ir,) = await _get_irs([text], parser_version())
+    return ir
+
+
 async def cache_ir(text: str, ir: QueryIR):
+    await _set_many({text_key(text): encode_ir(ir)}, binary=True)
+
+
+async def get_irs_for_texts(texts: list[str]) -> list[QueryIR | None]:
+    """Batch IR lookup: L1, then one Redis round-trip; results in input order."""
+    if not texts:
+        return []
+    return await _get_irs(texts, parser_version())
+
+
+async def get_previous_irs(texts: list[str]) -> list[QueryIR | None]:
+    """IRs cached under the previous parser namespace, served until re-parsed."""
+    try:
+        previous = await previous_parser_version()
+    except REDIS_ERRORS as e:
+        logger.warning("Failed to look up previous parser version: %s", e)
+        previous = None
+    if not texts or previous is None:
+        return [None] * len(texts)
+    return await _get_irs(texts, previous)
+
+
+async def has_ir(text: str) -> bool:
+    """Whether ``text`` is cached in the current namespace (no TTL refresh)."""
+    r = await init_redis()
+    return bool(await r.exists(text_key(text)))
+
+
+async def hot_texts(version: str, limit: int) -> list[tuple[str, int]]:
+    """Most-hit canonical texts of a namespace, hottest first."""
+    r = await init_redis()
+    rows = await r.zrevrange(hot_key(version), 0, limit - 1, withscores=True)
+    return [(text, int(score)) for text, score in rows]
+
+
+async def cache_irs(items: dict[str, QueryIR], hits: dict[str, int] | None = None):
+    """Batch IR write: all SETs in one pipelined round-trip.
+
+    ``hits`` optionally seeds per-text popularity (see ``ttl_for_hits``).
+    """
+    await _set_many(
+        {text_key(text): encode_ir(ir) for text, ir in items.items()},
+        binary=True,
+        hits={text_key(t): n for t, n in (hits or {}).items()},
+    )
+
+
+def response_key(text: str, version: str | None = None) -> str:
+    """Key for serialized ParseResponse bytes.
+
+    Versioned by compiler and parser fingerprint (which covers the tag-index
+    content) so a compiler, prompt, model or tag change never serves stale
+    queries/tags.
+    """
+    version = version or parser_version()
+    return (
+        f"resp:c{COMPILER_VERSION}:p{version}:"
+        + hashlib.sha1(text.encode()).hexdigest()
+    )
+
+
+async def get_response(text: str) -> str | None:
+    """Serialized ParseResponse JSON, ready to write to the socket as-is."""
+    # Tracked as hot: repeats of a text are answered here, not by the IR cache
+    (raw,) = await _get_many("response", [text], parser_version(), track=True)
+    return raw
+
+
+async def cache_response(text: str, body: str):
+    await _set_many({response_key(text): body})
+
+
+def tag_candidates_key(text: str, params: tuple) -> str:
+    """Key for (art, oracle) tag candidates of canonical ``text``.
+
+    ``params`` are the suggestion limits/thresholds; the tag-index digest
+    scopes entries to one tag set.
+    """
+    idx = load_index()
+    raw = "|".join(map(str, params)) + "|" + text
+    return f"tagc:t{idx.digest}:" + hashlib.sha1(raw.encode()).hexdigest()
+
+
+async def get_tag_candidates(keys: list[str]) -> list[str | None]:
+    """Serialized candidates for ``keys`` in one MGET, in input order."""
+    if not keys:
+        return []
+    r = await init_redis()
+    return await r.mget(keys)
+
+
+async def cache_tag_candidates(items: dict[str, str]):
+    if not items:
+        return
+    try:
+        r = await init_redis()
+        async with r.pipeline(transaction=False) as pipe:
+            for key, raw in items.items():
+                pipe.set(key, raw, ex=settings.tag_cache_ttl_secs)
+            await pipe.execute()
+    except REDIS_ERRORS as e:
+        logger.warning("Redis write failed, tag candidates kept locally: %s", e)
+
+
+TAG_RELOAD_CHANNEL = "nlq:tags:reload"
+
+
+async def publish_tag_reload(digest: str):
+    """Tell every worker (all replicas) to reload the tag index."""
     r = await init_redis()
-    raw = ir.model_dump_json()
-    await r.set(text_key(text), raw, ex=settings.cache_ttl_secs)
+    await r.publish(TAG_RELOAD_CHANNEL, digest)
+
 
+async def invalidation_messages():
+    """Yield key lists that other workers have rewritten (until cancelled).
 
-async def get_compiled_query(ir: QueryIR) -> str | None:
+    L1 is cleared once subscribed: anything published while this worker was
+    not listening (startup, a dropped connection) has been missed.
+    """
     r = await init_redis()
-    raw = ir.model_dump_json()
-    ck = ir_key(raw)
-    return await r.get(ck)
+    pubsub = r.pubsub()
+    await pubsub.subscribe(INVALIDATE_CHANNEL)
+    l1.clear()
+    origin = _origin()
+    try:
+        async for msg in pubsub.listen():
+            if msg["type"] != "message":
+                continue
+            try:
+                data = json.loads(msg["data"])
+            except ValueError:
+                continue
+            if data.get("origin") != origin:
+                yield data.get("keys", [])
+    finally:
+        await pubsub.aclose()
 
 
-async def cache_compiled_query(ir: QueryIR, query: str):
+async def tag_reload_messages():
+    """Yield the digest of each announced tag reload (until cancelled)."""
     r = await init_redis()
-    raw = ir.model_dump_json()
-    ck = ir_key(raw)
-    await r.set(ck, query, ex=settings.cache_ttl_secs)
+    pubsub = r.pubsub()
+    await pubsub.subscribe(TAG_RELOAD_CHANNEL)
+    try:
+        async for msg in pubsub.listen():
+            if msg["type"] == "message":
+                yield msg["data"]
+    finally:
+        await pubsub.aclose()
 
 
 __all__ = [
     "init_redis",
+    "init_redis_bytes",
     "get_ir_for_text",
     "cache_ir",
-    "get_compiled_query",
-    "cache_compiled_query",
+    "get_irs_for_texts",
+    "ttl_for_hits",
+    "cache_irs",
+    "get_previous_irs",
+    "has_ir",
+    "hot_texts",
+    "parser_version",
+    "previous_parser_version",
+    "get_response",
+    "cache_response",
+    "get_tag_candidates",
+    "cache_tag_candidates",
+    "REDIS_ERRORS",
+    "invalidation_messages",
+    "l1",
+    "L1Cache",
+    "publish_tag_reload",
+    "tag_reload_messages",
+    "record_variant",
+    "top_variant_counts",
+    "acquire_lease",
+    "release_lease",
+    "lease_held",
+    "acquire_reparse_lock",
+    "extend_reparse_lock",
+    "release_reparse_lock",
 ]
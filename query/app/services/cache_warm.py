@@ -0,0 +1,109 @@
+"""Pre-parse the most requested queries into the IR cache (run at deploy time).
+
+Reads a request log (JSONL, one ``{"text": ...}`` object per line, other
+keys ignored), canonicalizes every text and parses the ``--top`` most
+frequent ones that are not already cached, with at most ``--concurrency``
+LLM calls in flight. Texts the decompiler or fast path answer are skipped
+(they never reach the cache). Each IR is written with its log count as
+seeded popularity, so hot entries start with an extended TTL.
+
+Run from query/ with the service's environment (Redis, OpenAI)::
+
+    python -m app.services.cache_warm requests.jsonl --top 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from pathlib import Path
+
+from app.core.config import settings
+from app.models import QueryIR
+from . import cache, usage
+from .compiler import decompile_scryfall
+from .fastpath import fast_parse
+from .llm import close_client, parse_nl_query
+from .normalize import canonicalize
+from .tag_cache import cached_tag_candidates_many
+
+logger = logging.getLogger(__name__)
+
+
+def top_queries(path: Path, n: int) -> list[tuple[str, int]]:
+    """(canonical text, count) of the ``n`` most frequent LLM-bound texts."""
+    counts: Counter[str] = Counter()
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            raw = json.loads(line).get("text")
+        except ValueError:
+            continue
+        if not raw or decompile_scryfall(raw) is not None:
+            continue
+        text = canonicalize(raw)
+        if settings.enable_fastpath and fast_parse(text) is not None:
+            continue
+        counts[text] += 1
+    return counts.most_common(n)
+
+
+async def warm(queries: list[tuple[str, int]], concurrency: int) -> dict[str, int]:
+    """Parse and cache every uncached text in ``queries``; returns counters."""
+    stats = {"requested": len(queries), "cached": 0, "parsed": 0, "failed": 0}
+    texts = [text for text, _ in queries]
+    counts = dict(queries)
+    hits = await cache.get_irs_for_texts(texts)
+    misses = [text for text, ir in zip(texts, hits) if ir is None]
+    stats["cached"] = len(texts) - len(misses)
+    candidates: list = [None] * len(misses)
+    if misses and settings.enable_tag_candidates:
+        candidates = await cached_tag_candidates_many(misses)
+
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _parse(text: str, cands) -> QueryIR | None:
+        async with sem:
+            ir, _ = await parse_nl_query(text, cands)
+        if ir is not None:
+            await cache.cache_irs({text: ir}, hits={text: counts[text]})
+        return ir
+
+    results = await asyncio.gather(*(_parse(t, c) for t, c in zip(misses, candidates)))
+    stats["parsed"] = sum(ir is not None for ir in results)
+    stats["failed"] = len(results) - stats["parsed"]
+    return stats
+
+
+async def main(path: Path, top: int, concurrency: int):
+    t0 = time.perf_counter()
+    llm_usage = usage.start_request()
+    await cache.init_redis()
+    try:
+        stats = await warm(top_queries(path, top), concurrency)
+    finally:
+        await close_client()
+    logger.info(
+        "Cache warm: %s secs=%.1f %s",
+        " ".join(f"{k}={v}" for k, v in stats.items()),
+        time.perf_counter() - t0,
+        llm_usage.log_fields(),
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log", type=Path, help="request log, JSONL of {'text': ...}")
+    parser.add_argument("--top", type=int, default=500)
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.batch_llm_concurrency
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.log, args.top, args.concurrency))
@@ -3,10 +3,13 @@
 from __future__ import annotations
 
 from typing import List
+import logging
 import re
 from app.models import QueryIR
 from prometheus_client import Counter, Histogram
 
+logger = logging.getLogger(__name__)
+
 # Metrics
 COMPILE_COUNT = Counter(
     "compile_attempts_total",
@@ -22,6 +25,13 @@ COMPILE_WARNINGS = Counter(
     namespace="grimoire",
     subsystem="query",
 )
+DECOMPILE_COUNT = Counter(
+    "decompile_attempts_total",
+    "Total Scryfall syntax -> QueryIR decompile attempts",
+    ["outcome"],  # outcome: success, rejected
+    namespace="grimoire",
+    subsystem="query",
+)
 COMPILE_LATENCY = Histogram(
     "compile_latency_seconds",
     "Latency of compiling QueryIR to Scryfall query string",
@@ -31,6 +41,10 @@ COMPILE_LATENCY = Histogram(
 )
 
 
+# Bump whenever compiled output for the same IR changes (invalidates cached responses)
+COMPILER_VERSION = 1
+
+
 def _quote_token(tok: str) -> str:
     if not tok:
         return tok
@@ -305,4 +319,298 @@ def compile_to_scryfall(ir: QueryIR) -> tuple[str, list[str], list[str]]:
     return query, parts, warnings
 
 
-__all__ = ["compile_to_scryfall", "ScryfallCompiler"]
+# --- Decompiler: Scryfall syntax -> QueryIR (inverse of ScryfallCompiler) ---
+
+CARD_TYPE_WORDS = {
+    "artifact",
+    "battle",
+    "conspiracy",
+    "creature",
+    "dungeon",
+    "enchantment",
+    "instant",
+    "kindred",
+    "land",
+    "phenomenon",
+    "plane",
+    "planeswalker",
+    "scheme",
+    "sorcery",
+    "tribal",
+    "vanguard",
+}
+SUPERTYPE_WORDS = {"basic", "legendary", "ongoing", "snow", "world"}
+
+_NUMERIC_KEYS = {
+    "mv": "mana_value",
+    "cmc": "mana_value",
+    "manavalue": "mana_value",
+    "pow": "power",
+    "power": "power",
+    "tou": "toughness",
+    "toughness": "toughness",
+    "loy": "loyalty",
+    "loyalty": "loyalty",
+    "number": "card_number",
+    "cn": "card_number",
+    "priceusd": "price_usd",
+    "usd": "price_usd",
+    "priceeur": "price_eur",
+    "eur": "price_eur",
+    "pricetix": "price_tix",
+    "tix": "price_tix",
+}
+_CATEGORICAL_KEYS = {
+    "layout": "layout",
+    "lang": "languages",
+    "language": "languages",
+    "artist": "artist",
+    "a": "artist",
+    "watermark": "watermark",
+    "wm": "watermark",
+    "border": "border",
+    "frame": "frame",
+    "reprint": "reprint_groups",
+}
+# key -> (IR field for ':', IR field for '=', IR field for negated ':')
+_TEXT_KEYS = {
+    "name": ("name_contains", "name_exact", "name_not"),
+    "o": ("oracle_text_contains", "oracle_text_exact", "oracle_text_not"),
+    "oracle": ("oracle_text_contains", "oracle_text_exact", "oracle_text_not"),
+    "flavor": ("flavor_text_contains", "flavor_text_exact", "flavor_text_not"),
+    "ft": ("flavor_text_contains", "flavor_text_exact", "flavor_text_not"),
+}
+_ENTITY_TEXT_FIELDS = {"name_contains", "oracle_text_contains"}
+_ART_TAG_KEYS = {"arttag", "art", "atag"}
+_ORACLE_TAG_KEYS = {"otag", "oracletag", "function"}
+_SET_KEYS = {"e", "s", "set", "edition"}
+
+_TERM_RE = re.compile(
+    r"""
+    (?P<neg>-)?
+    (?P<key>[a-z]+)
+    (?P<op><=|>=|!=|:|=|<|>)
+    (?:"(?P<quoted>(?:[^"\\]|\\.)*)"|(?P<bare>[^\s()"]+))
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+class DecompileError(ValueError):
+    """Raised when input is not Scryfall syntax the IR can represent exactly."""
+
+
+class ScryfallDecompiler:
+    """Parse Scryfall search syntax into QueryIR.
+
+    Strict by design: any term the IR cannot represent losslessly (bare
+    words, unknown keys, negated numerics, mixed ``or`` groups, unknown tags)
+    raises ``DecompileError`` so the caller can fall back to the LLM.
+    """
+
+    def __init__(self, query: str):
+        self.query = query.strip()
+        self.pos = 0
+        self.data: dict = {"entity": {}}
+
+    def decompile(self) -> QueryIR:
+        if not self.query:
+            raise DecompileError("empty query")
+        while True:
+            self._skip_ws()
+            if self.pos >= len(self.query):
+                break
+            if self.query[self.pos] == "(":
+                self._parse_or_group()
+            else:
+                self._apply(*self._next_term())
+        return QueryIR.model_validate(self.data)
+
+    # --- Tokenizing ---
+    def _skip_ws(self):
+        while self.pos < len(self.query) and self.query[self.pos].isspace():
+            self.pos += 1
+
+    def _next_term(self) -> tuple[bool, str, str, str]:
+        m = _TERM_RE.match(self.query, self.pos)
+        if not m:
+            raise DecompileError(f"unparseable term at offset {self.pos}")
+        end = m.end()
+        if end < len(self.query) and not (
+            self.query[end].isspace() or self.query[end] == ")"
+        ):
+            raise DecompileError(f"unexpected character at offset {end}")
+        self.pos = end
+        if m.group("quoted") is not None:
+            value = re.sub(r"\\(.)", r"\1", m.group("quoted"))
+        else:
+            value = m.group("bare")
+        return bool(m.group("neg")), m.group("key").lower(), m.group("op"), value
+
+    def _parse_or_group(self):
+        # Only "(r:a or r:b ...)" has an IR equivalent (rarities list)
+        self.pos += 1
+        rarities: list[str] = []
+        while True:
+            self._skip_ws()
+            neg, key, op, value = self._next_term()
+            if neg or key not in ("r", "rarity") or op != ":":
+                raise DecompileError("only rarity or-groups are supported")
+            rarities.append(self._rarity(value))
+            self._skip_ws()
+            if self.query.startswith(")", self.pos):
+                self.pos += 1
+                break
+            if self.query[self.pos : self.pos + 3].lower() == "or ":
+                self.pos += 3
+                continue
+            raise DecompileError("expected 'or' or ')' in group")
+        if len(rarities) < 2:
+            raise DecompileError("or-group needs at least two terms")
+        self._extend("rarities", rarities)
+
+    # --- Term semantics ---
+    def _extend(self, field: str, values: list[str], entity: bool = False):
+        target = self.data["entity"] if entity else self.data
+        target.setdefault(field, []).extend(values)
+
+    def _set_once(self, field: str, value):
+        if field in self.data:
+            raise DecompileError(f"duplicate {field} constraint")
+        self.data[field] = value
+
+    @staticmethod
+    def _rarity(value: str) -> str:
+        rl = value.lower()
+        if rl not in VALID_RARITIES:
+            raise DecompileError(f"unknown rarity {value}")
+        return rl
+
+    def _apply(self, neg: bool, key: str, op: str, value: str):
+        if key in _TEXT_KEYS:
+            contains, exact, negated = _TEXT_KEYS[key]
+            if neg and op == ":":
+                return self._extend(negated, [value])
+            if not neg and op in (":", "="):
+                field = contains if op == ":" else exact
+                return self._extend(field, [value], entity=field in _ENTITY_TEXT_FIELDS)
+            raise DecompileError(f"unsupported text operator {op} for {key}")
+        if neg:
+            raise DecompileError(f"negation not representable for {key}")
+        if key in ("t", "type"):
+            if op != ":":
+                raise DecompileError("type filter requires ':'")
+            vl = value.lower()
+            if vl in CARD_TYPE_WORDS:
+                return self._extend("card_types", [value], entity=True)
+            if vl in SUPERTYPE_WORDS:
+                return self._extend("supertypes", [value], entity=True)
+            return self._extend("subtypes", [value], entity=True)
+        if key in _NUMERIC_KEYS:
+            if op not in ("<", "<=", "=", ">=", ">") or not value.isdigit():
+                raise DecompileError(f"unsupported numeric term {key}{op}{value}")
+            return self._set_once(_NUMERIC_KEYS[key], {"op": op, "value": int(value)})
+        if key in _CATEGORICAL_KEYS and op == ":":
+            return self._extend(_CATEGORICAL_KEYS[key], [value])
+        if key in _ART_TAG_KEYS | _ORACLE_TAG_KEYS and op == ":":
+            return self._apply_tag(key, value)
+        if key in ("id", "identity", "c", "color"):
+            return self._apply_colors(key, op, value)
+        if key in ("year", "date"):
+            return self._apply_release(key, op, value)
+        if key in _SET_KEYS and op == ":":
+            if not SET_CODE_RE.match(value):
+                raise DecompileError(f"invalid set code {value}")
+            return self._extend("set_codes", [value])
+        if key in ("r", "rarity") and op == ":":
+            return self._extend("rarities", [self._rarity(value)])
+        if key in ("legal", "f", "format", "banned") and op == ":":
+            legal = key != "banned"
+            self.data.setdefault("formats", []).append(
+                {"name": value.lower(), "legal": legal}
+            )
+            return
+        if key == "sort" and op == ":":
+            self.data.setdefault("sort", {})["by"] = value.lower()
+            return
+        if key in ("order", "direction") and op == ":":
+            if value.lower() not in ("asc", "desc"):
+                raise DecompileError(f"unknown sort direction {value}")
+            self.data.setdefault("sort", {})["direction"] = value.lower()
+            return
+        raise DecompileError(f"unsupported term {key}{op}{value}")
+
+    def _apply_tag(self, key: str, value: str):
+        # Avoid importing at module load: models import tag_index too
+        from .tag_index import load_index
+
+        idx = load_index()
+        tag = value.strip().lower()
+        if key in _ART_TAG_KEYS:
+            if tag not in idx.art_tags:
+                raise DecompileError(f"unknown art tag {value}")
+            return self._extend("art_tags", [tag])
+        if tag not in idx.oracle_tags:
+            raise DecompileError(f"unknown oracle tag {value}")
+        return self._extend("oracle_tags", [tag])
+
+    def _apply_colors(self, key: str, op: str, value: str):
+        # IR only models subset (<=) and exact (=) color constraints
+        if op not in ("<=", "="):
+            raise DecompileError(f"unsupported color operator {op}")
+        letters = value.upper()
+        if not letters or any(ch not in VALID_COLORS for ch in letters):
+            raise DecompileError(f"unsupported color value {value}")
+        mode = "identity_only" if key in ("id", "identity") else "card_color"
+        self._set_once(
+            "colors",
+            {
+                "mode": mode,
+                "set": sorted(set(letters), key="WUBRG".index),
+                "strict": op == "=",
+            },
+        )
+
+    def _apply_release(self, key: str, op: str, value: str):
+        if op not in ("<", "<=", "=", ">=", ">"):
+            raise DecompileError(f"unsupported date operator {op}")
+        if key == "date":
+            if not _DATE_RE.match(value):
+                raise DecompileError(f"unsupported date {value}")
+            return self._set_once("release_date", {"op": op, "date": value})
+        if not value.isdigit() or len(value) != 4:
+            raise DecompileError(f"unsupported year {value}")
+        # year>=Y / year<Y fall on Jan 1st; year= would need a date range
+        if op in (">=", "<"):
+            return self._set_once("release_date", {"op": op, "date": f"{value}-01-01"})
+        if op == ">":
+            # ScryfallCompiler emits year>Y for date>Y-01-01
+            return self._set_once("release_date", {"op": op, "date": f"{value}-01-01"})
+        if op == "<=":
+            return self._set_once(
+                "release_date", {"op": "<", "date": f"{int(value) + 1}-01-01"}
+            )
+        raise DecompileError("year= has no single-date IR equivalent")
+
+
+def decompile_scryfall(query: str) -> QueryIR | None:
+    """Return QueryIR for valid Scryfall syntax, or None if not fully parseable."""
+    try:
+        ir = ScryfallDecompiler(query).decompile()
+    except (DecompileError, ValueError) as e:
+        DECOMPILE_COUNT.labels("rejected").inc()
+        logger.debug("Scryfall decompile rejected %r: %s", query, e)
+        return None
+    DECOMPILE_COUNT.labels("success").inc()
+    return ir
+
+
+__all__ = [
+    "COMPILER_VERSION",
+    "compile_to_scryfall",
+    "ScryfallCompiler",
+    "decompile_scryfall",
+    "ScryfallDecompiler",
+    "DecompileError",
+]
@@ -0,0 +1,99 @@
+"""Lexical similarity index over the few-shot example pool.
+
+Each example input is canonicalized and turned into a TF-IDF vector over
+word tokens and character trigrams (trigrams keep plurals and typos close:
+"angels" ~ "angel"). Vectors are L2-normalized and stored as postings, so a
+lookup only touches examples sharing at least one feature with the query.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Iterable
+
+from prometheus_client import Histogram
+
+from .few_shot_examples import CORE_FEW_SHOT, EXAMPLE_POOL
+from .normalize import canonicalize
+
+FEW_SHOT_TOP_SIMILARITY = Histogram(
+    "few_shot_top_similarity",
+    "Cosine similarity of the closest few-shot example to the request",
+    buckets=(0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8, 1.0),
+    namespace="grimoire",
+    subsystem="query",
+)
+
+_TOKEN_RE = re.compile(r"[a-z]+|\d+|[<>=]+")
+_STOPWORDS = {"a", "an", "and", "the", "of", "in", "with", "that", "for", "me"}
+
+
+def _features(text: str) -> Counter:
+    feats: Counter = Counter()
+    for tok in _TOKEN_RE.findall(text):
+        if tok in _STOPWORDS:
+            continue
+        feats["w:" + tok] += 1
+        if tok[0].isalpha() and len(tok) >= 3:
+            padded = f"#{tok}#"
+            feats.update("c:" + padded[i : i + 3] for i in range(len(padded) - 2))
+    return feats
+
+
+class ExampleIndex:
+    def __init__(self, examples: Iterable[dict], fallback: Iterable[dict] = ()):
+        self.examples = list(examples)
+        # Padding when fewer than k examples share any feature with the input
+        self.fallback = list(fallback)
+        vectors = [_features(canonicalize(ex["input"])) for ex in self.examples]
+        df = Counter(f for v in vectors for f in v)
+        n = len(vectors)
+        self._idf = {f: math.log((1 + n) / (1 + c)) + 1 for f, c in df.items()}
+        self._postings: dict[str, list[tuple[int, float]]] = defaultdict(list)
+        for i, tf in enumerate(vectors):
+            for f, w in self._weigh(tf).items():
+                self._postings[f].append((i, w))
+
+    def _weigh(self, tf: Counter) -> dict[str, float]:
+        vec = {f: c * self._idf[f] for f, c in tf.items() if f in self._idf}
+        norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+        return {f: w / norm for f, w in vec.items()}
+
+    def scores(self, text: str) -> dict[int, float]:
+        """Cosine similarity of canonical ``text`` to every overlapping example."""
+        scores: dict[int, float] = defaultdict(float)
+        for f, w in self._weigh(_features(text)).items():
+            for i, wi in self._postings[f]:
+                scores[i] += w * wi
+        return scores
+
+    def select(self, text: str, k: int) -> list[dict]:
+        """Up to ``k`` examples closest to ``text`` (then fallback), most similar last."""
+        scores = self.scores(text)
+        top = heapq.nlargest(k, scores.items(), key=lambda kv: (kv[1], -kv[0]))
+        FEW_SHOT_TOP_SIMILARITY.observe(top[0][1] if top else 0.0)
+        chosen = [self.examples[i] for i, _ in top]
+        for ex in self.fallback:
+            if len(chosen) >= k:
+                break
+            if ex not in chosen:
+                chosen.append(ex)
+        # Closest example sits right above the input line
+        return chosen[::-1]
+
+
+@lru_cache(maxsize=1)
+def load_example_index() -> ExampleIndex:
+    # CORE_FEW_SHOT is always in the static prompt prefix; select among the rest
+    return ExampleIndex([ex for ex in EXAMPLE_POOL if ex not in CORE_FEW_SHOT])
+
+
+def select_examples(text: str, k: int) -> list[dict]:
+    return load_example_index().select(text, k)
+
+
+__all__ = ["ExampleIndex", "load_example_index", "select_examples"]
@@ -0,0 +1,377 @@
+"""Deterministic rule-based parser for formulaic queries (LLM bypass).
+
+Runs on canonicalized text (see ``normalize.canonicalize``). Every token must
+be claimed by a rule for the result to be trusted; if any token is left over
+the parser returns ``None`` and the caller falls through to the LLM.
+
+Covered vocabulary: colors (incl. ``mono``, guilds and shards), card types,
+supertypes, common creature subtypes, comparison atoms (``mv<=5``, ``pow>3``,
+``usd<1`` ...), ``cmc 3 or less`` phrasing, format legality, release year
+(``after 2021``, ``before 2010``, ``since 2019``), rarities and ``set <code>``.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+
+from prometheus_client import Counter, Histogram
+from pydantic import ValidationError
+
+from app.models import QueryIR
+
+FASTPATH_OUTCOMES = Counter(
+    "fastpath_outcomes_total",
+    "Rule-based fast-path parse outcomes",
+    ["outcome"],  # outcome: hit, fallthrough
+    namespace="grimoire",
+    subsystem="query",
+)
+FASTPATH_COVERAGE = Histogram(
+    "fastpath_token_coverage_ratio",
+    "Fraction of input tokens claimed by fast-path rules",
+    buckets=(0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0),
+    namespace="grimoire",
+    subsystem="query",
+)
+
+logger = logging.getLogger(__name__)
+
+COLOR_WORDS = {
+    "white": "W",
+    "blue": "U",
+    "black": "B",
+    "red": "R",
+    "green": "G",
+}
+MULTICOLOR_WORDS = {
+    "azorius": "WU",
+    "dimir": "UB",
+    "rakdos": "BR",
+    "gruul": "RG",
+    "selesnya": "GW",
+    "orzhov": "WB",
+    "izzet": "UR",
+    "golgari": "BG",
+    "boros": "RW",
+    "simic": "GU",
+    "bant": "GWU",
+    "esper": "WUB",
+    "grixis": "UBR",
+    "jund": "BRG",
+    "naya": "RGW",
+}
+CARD_TYPES = {
+    "creature": "creature",
+    "creatures": "creature",
+    "instant": "instant",
+    "instants": "instant",
+    "sorcery": "sorcery",
+    "sorceries": "sorcery",
+    "enchantment": "enchantment",
+    "enchantments": "enchantment",
+    "artifact": "artifact",
+    "artifacts": "artifact",
+    "land": "land",
+    "lands": "land",
+    "planeswalker": "planeswalker",
+    "planeswalkers": "planeswalker",
+    "battle": "battle",
+    "battles": "battle",
+}
+SUPERTYPES = {"legendary", "basic", "snow"}
+CREATURE_SUBTYPES = {
+    "angel",
+    "beast",
+    "cat",
+    "cleric",
+    "demon",
+    "dinosaur",
+    "dragon",
+    "dwarf",
+    "eldrazi",
+    "elemental",
+    "elf",
+    "faerie",
+    "giant",
+    "goblin",
+    "horror",
+    "human",
+    "hydra",
+    "knight",
+    "merfolk",
+    "ninja",
+    "pirate",
+    "rogue",
+    "sliver",
+    "soldier",
+    "sphinx",
+    "spirit",
+    "vampire",
+    "warrior",
+    "wizard",
+    "wolf",
+    "zombie",
+}
+_IRREGULAR_PLURALS = {
+    "elves": "elf",
+    "dwarves": "dwarf",
+    "wolves": "wolf",
+    "sphinxes": "sphinx",
+    "faeries": "faerie",
+}
+FORMATS = {
+    "standard",
+    "pioneer",
+    "modern",
+    "legacy",
+    "vintage",
+    "commander",
+    "pauper",
+    "brawl",
+    "historic",
+    "alchemy",
+    "explorer",
+    "oathbreaker",
+    "penny",
+}
+_FORMAT_ALIASES = {"edh": "commander"}
+RARITIES = {
+    "common": "common",
+    "commons": "common",
+    "uncommon": "uncommon",
+    "uncommons": "uncommon",
+    "rare": "rare",
+    "rares": "rare",
+    "mythic": "mythic",
+    "mythics": "mythic",
+}
+# Tokens that carry no query meaning on their own
+FILLER = {"a", "all", "and", "any", "are", "card", "cards", "find", "me", "show"}
+FILLER |= {"that", "the", "with", "in", "of"}
+
+_ATOM_FIELDS = {
+    "mv": "mana_value",
+    "pow": "power",
+    "tou": "toughness",
+    "loy": "loyalty",
+    "usd": "price_usd",
+    "eur": "price_eur",
+    "tix": "price_tix",
+}
+_ATOM_RE = re.compile(r"^([a-z]+)(<=|>=|=|<|>)(\d+)$")
+_YEAR_RE = re.compile(r"^(19|20)\d\d$")
+_SET_CODE_RE = re.compile(r"^[a-z0-9]{2,5}$")
+# Words that can follow "set" in prose ("set of angels") but are never codes
+_NOT_SET_CODES = FILLER | {"for", "from", "or", "not", "to", "on", "is", "it", "my"}
+_NOT_SET_CODES |= set(COLOR_WORDS) | set(CARD_TYPES) | set(RARITIES) | FORMATS
+
+
+def _subtype(tok: str) -> str | None:
+    if tok in CREATURE_SUBTYPES:
+        return tok
+    if tok in _IRREGULAR_PLURALS:
+        return _IRREGULAR_PLURALS[tok]
+    if tok.endswith("s") and tok[:-1] in CREATURE_SUBTYPES:
+        return tok[:-1]
+    return None
+
+
+def _is_set_code(tok: str) -> bool:
+    return (
+        bool(_SET_CODE_RE.match(tok))
+        and not tok.isdigit()
+        and tok not in _NOT_SET_CODES
+    )
+
+
+def _format(tok: str) -> str | None:
+    tok = _FORMAT_ALIASES.get(tok, tok)
+    return tok if tok in FORMATS else None
+
+
+class _FastParser:
+    def __init__(self, tokens: list[str]):
+        self.toks = tokens
+        self.i = 0
+        self.claimed = 0
+        self.skipped = 0
+        self.data: dict = {"entity": {}}
+        self.colors: list[str] = []
+
+    def peek(self, offset: int = 0) -> str | None:
+        j = self.i + offset
+        return self.toks[j] if j < len(self.toks) else None
+
+    def take(self, n: int = 1, meaningful: bool = True):
+        self.i += n
+        if meaningful:
+            self.claimed += n
+        else:
+            self.skipped += n
+
+    def _entity_add(self, field: str, value: str):
+        vals = self.data["entity"].setdefault(field, [])
+        if value not in vals:
+            vals.append(value)
+
+    def _set_compare(self, field: str, op: str, value: int) -> bool:
+        if field in self.data:
+            return False  # conflicting duplicate; let the LLM sort it out
+        self.data[field] = {"op": op, "value": value}
+        return True
+
+    def step(self) -> bool:
+        tok = self.peek()
+        nxt = self.peek(1)
+        if tok in FILLER:
+            self.take(meaningful=False)
+            return True
+        if tok == "mono" and nxt in COLOR_WORDS:
+            self.take()
+            return True
+        if tok in COLOR_WORDS:
+            self.colors.append(COLOR_WORDS[tok])
+            self.take()
+            return True
+        if tok in MULTICOLOR_WORDS:
+            self.colors.extend(MULTICOLOR_WORDS[tok])
+            self.take()
+            return True
+        if tok in CARD_TYPES:
+            self._entity_add("card_types", CARD_TYPES[tok])
+            self.take()
+            return True
+        if tok in SUPERTYPES:
+            self._entity_add("supertypes", tok)
+            self.take()
+            return True
+        sub = _subtype(tok)
+        if sub:
+            self._entity_add("subtypes", sub)
+            self.take()
+            return True
+        m = _ATOM_RE.match(tok)
+        if m and m.group(1) in _ATOM_FIELDS:
+            field, op, value = m.groups()
+            self.take()
+            return self._set_compare(_ATOM_FIELDS[field], op, int(value))
+        if tok in ("mv", "cmc") and nxt and nxt.isdigit():
+            return self._mana_phrase(int(nxt))
+        if tok == "legal" and nxt == "in" and _format(self.peek(2) or ""):
+            self.data.setdefault("formats", []).append(
+                {"name": _format(self.peek(2) or ""), "legal": True}
+            )
+            self.take(3)
+            return True
+        if tok == "legal" and nxt and _format(nxt):
+            self.data.setdefault("formats", []).append(
+                {"name": _format(nxt), "legal": True}
+            )
+            self.take(2)
+            return True
+        if _format(tok) and nxt == "legal":
+            self.data.setdefault("formats", []).append(
+                {"name": _format(tok), "legal": True}
+            )
+            self.take(2)
+            return True
+        if tok == "banned" and nxt and _format(nxt):
+            self.data.setdefault("formats", []).append(
+                {"name": _format(nxt), "legal": False}
+            )
+            self.take(2)
+            return True
+        if tok in ("after", "since", "before") and nxt and _YEAR_RE.match(nxt):
+            return self._release_year(tok, int(nxt))
+        if tok in RARITIES:
+            rarity = RARITIES[tok]
+            rars = self.data.setdefault("rarities", [])
+            if rarity not in rars:
+                rars.append(rarity)
+            # "mythic rare" is the rarity's full name, not mythic + rare
+            self.take(2 if rarity == "mythic" and nxt in ("rare", "rares") else 1)
+            return True
+        if tok == "set" and nxt and _is_set_code(nxt):
+            self.data.setdefault("set_codes", []).append(nxt)
+            self.take(2)
+            return True
+        return False
+
+    def _mana_phrase(self, value: int) -> bool:
+        # "mv 3", "cmc 3 or less", "mv 4 or more" / "or greater" / "or fewer"
+        tail = (self.peek(2), self.peek(3))
+        if tail[0] == "or" and tail[1] in ("less", "fewer", "lower"):
+            self.take(4)
+            return self._set_compare("mana_value", "<=", value)
+        if tail[0] == "or" and tail[1] in ("more", "greater", "higher"):
+            self.take(4)
+            return self._set_compare("mana_value", ">=", value)
+        self.take(2)
+        return self._set_compare("mana_value", "=", value)
+
+    def _release_year(self, word: str, year: int) -> bool:
+        if "release_date" in self.data:
+            return False
+        if word == "after":
+            rd = {"op": ">=", "date": f"{year + 1}-01-01"}
+        elif word == "since":
+            rd = {"op": ">=", "date": f"{year}-01-01"}
+        else:
+            rd = {"op": "<", "date": f"{year}-01-01"}
+        self.data["release_date"] = rd
+        self.take(2)
+        return True
+
+    def parse(self, lenient: bool = False) -> QueryIR | None:
+        """Strict: every token must be claimed. Lenient: skip unclaimed tokens."""
+        complete = True
+        while self.i < len(self.toks):
+            before = self.i
+            if not self.step():
+                complete = False
+                if not lenient:
+                    break
+                if self.i == before:
+                    self.i += 1
+        if not lenient:
+            meaningful = len(self.toks) - self.skipped
+            FASTPATH_COVERAGE.observe(self.claimed / max(1, meaningful))
+        if (not complete and not lenient) or self.claimed == 0:
+            return None
+        ent = self.data["entity"]
+        if ent.get("subtypes") and not ent.get("card_types"):
+            ent["card_types"] = ["creature"]
+        if self.colors:
+            ordered = sorted(set(self.colors), key="WUBRG".index)
+            self.data["colors"] = {
+                "mode": "identity_only",
+                "set": ordered,
+                "strict": False,
+            }
+        try:
+            return QueryIR.model_validate(self.data)
+        except ValidationError as e:  # pragma: no cover - rules should emit valid IR
+            logger.warning("Fast-path produced invalid IR: %s", e)
+            return None
+
+
+def fast_parse(text: str) -> QueryIR | None:
+    """Parse canonical ``text`` without the LLM, or return ``None`` to fall through."""
+    tokens = [t for t in text.split(" ") if t]
+    if not tokens:
+        return None
+    ir = _FastParser(tokens).parse()
+    FASTPATH_OUTCOMES.labels("hit" if ir is not None else "fallthrough").inc()
+    return ir
+
+
+def fast_parse_partial(text: str) -> QueryIR | None:
+    """Best-effort IR from whatever tokens the rules recognize (provisional use only)."""
+    tokens = [t for t in text.split(" ") if t]
+    if not tokens:
+        return None
+    return _FastParser(tokens).parse(lenient=True)
+
+
+__all__ = ["fast_parse", "fast_parse_partial"]
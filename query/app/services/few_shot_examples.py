@@ -100,3 +100,284 @@ FEW_SHOT = [
         },
     },
 ]
+
+# Sent with every prompt (shows the full IR shape); the rest of the pool,
+# other FEW_SHOT examples included, is selected per request
+CORE_FEW_SHOT = FEW_SHOT[:1]
+
+# Larger pool the per-request selector (app/services/example_index.py) draws
+# from. IRs list only non-default fields to keep prompts short.
+EXAMPLE_POOL = FEW_SHOT + [
+    {
+        "input": "red creatures with power 4 or more",
+        "ir": {
+            "entity": {"card_types": ["creature"]},
+            "colors": {"mode": "card_color", "set": ["R"]},
+            "power": {"op": ">=", "value": 4},
+        },
+    },
+    {
+        "input": "cheap creatures legal in modern",
+        "ir": {
+            "entity": {"card_types": ["creature"]},
+            "mana_value": {"op": "<=", "value": 2},
+            "formats": [{"name": "modern", "legal": True}],
+        },
+    },
+    {
+        "input": "green ramp spells for commander",
+        "ir": {
+            "colors": {"set": ["G"]},
+            "formats": [{"name": "commander", "legal": True}],
+            "oracle_tags": ["ramp"],
+        },
+    },
+    {
+        "input": "cheap black removal instants",
+        "ir": {
+            "entity": {"card_types": ["instant"]},
+            "mana_value": {"op": "<=", "value": 2},
+            "colors": {"set": ["B"]},
+            "oracle_tags": ["removal"],
+        },
+    },
+    {
+        "input": "blue counterspells that cost 2",
+        "ir": {
+            "mana_value": {"op": "=", "value": 2},
+            "colors": {"set": ["U"]},
+            "oracle_tags": ["counterspell"],
+        },
+    },
+    {
+        "input": "white board wipes legal in pioneer",
+        "ir": {
+            "colors": {"set": ["W"]},
+            "formats": [{"name": "pioneer", "legal": True}],
+            "oracle_tags": ["sweeper"],
+        },
+    },
+    {
+        "input": "black tutors under $5",
+        "ir": {
+            "colors": {"set": ["B"]},
+            "price_usd": {"op": "<", "value": 5},
+            "oracle_tags": ["tutor"],
+        },
+    },
+    {
+        "input": "mana rocks that cost 2 or less",
+        "ir": {
+            "entity": {"card_types": ["artifact"]},
+            "mana_value": {"op": "<=", "value": 2},
+            "oracle_tags": ["mana-rock"],
+        },
+    },
+    {
+        "input": "elf mana dorks",
+        "ir": {
+            "entity": {"card_types": ["creature"], "subtypes": ["elf"]},
+            "oracle_tags": ["mana-dork"],
+        },
+    },
+    {
+        "input": "landfall creatures in green or white",
+        "ir": {
+            "entity": {"card_types": ["creature"]},
+            "colors": {"set": ["G", "W"]},
+            "oracle_tags": ["landfall"],
+        },
+    },
+    {
+        "input": "lifegain cards in orzhov colors",
+        "ir": {
+            "colors": {"set": ["W", "B"]},
+            "oracle_tags": ["lifegain"],
+        },
+    },
+    {
+        "input": "reanimation spells in black legal in legacy",
+        "ir": {
+            "colors": {"set": ["B"]},
+            "formats": [{"name": "legacy", "legal": True}],
+            "oracle_tags": ["reanimate"],
+        },
+    },
+    {
+        "input": "blue cantrips for pauper",
+        "ir": {
+            "colors": {"set": ["U"]},
+            "rarities": ["common"],
+            "formats": [{"name": "pauper", "legal": True}],
+            "oracle_tags": ["cantrip"],
+        },
+    },
+    {
+        "input": "sacrifice outlets that are creatures",
+        "ir": {
+            "entity": {"card_types": ["creature"]},
+            "oracle_tags": ["sacrifice-outlet"],
+        },
+    },
+    {
+        "input": "mill cards for dimir",
+        "ir": {
+            "colors": {"set": ["U", "B"]},
+            "oracle_tags": ["mill"],
+        },
+    },
+    {
+        "input": "cards with a dragon in the art",
+        "ir": {"art_tags": ["dragon"]},
+    },
+    {
+        "input": "lands with a sunset in the artwork",
+        "ir": {
+            "entity": {"card_types": ["land"]},
+            "art_tags": ["sunset"],
+        },
+    },
+    {
+        "input": "black cards with skulls in the art",
+        "ir": {
+            "colors": {"mode": "card_color", "set": ["B"]},
+            "art_tags": ["skull"],
+        },
+    },
+    {
+        "input": "cat creatures illustrated with a moon",
+        "ir": {
+            "entity": {"card_types": ["creature"], "subtypes": ["cat"]},
+            "art_tags": ["moon"],
+        },
+    },
+    {
+        "input": "equipment showing a sword",
+        "ir": {
+            "entity": {"card_types": ["artifact"], "subtypes": ["equipment"]},
+            "art_tags": ["sword"],
+        },
+    },
+    {
+        "input": "legendary dragons",
+        "ir": {
+            "entity": {
+                "card_types": ["creature"],
+                "subtypes": ["dragon"],
+                "supertypes": ["legendary"],
+            },
+        },
+    },
+    {
+        "input": "legendary creatures that can be commanders in esper colors",
+        "ir": {
+            "entity": {"card_types": ["creature"], "supertypes": ["legendary"]},
+            "colors": {"set": ["W", "U", "B"]},
+            "formats": [{"name": "commander", "legal": True}],
+        },
+    },
+    {
+        "input": "exactly mono red cards not multicolor",
+        "ir": {"colors": {"mode": "card_color", "set": ["R"], "strict": True}},
+    },
+    {
+        "input": "mythic planeswalkers with loyalty 5 or more",
+        "ir": {
+            "entity": {"card_types": ["planeswalker"]},
+            "rarities": ["mythic"],
+            "loyalty": {"op": ">=", "value": 5},
+        },
+    },
+    {
+        "input": "rare cards from dominaria united",
+        "ir": {"set_codes": ["dmu"], "rarities": ["rare"]},
+    },
+    {
+        "input": "cards printed before 2000",
+        "ir": {"release_date": {"op": "<", "date": "2000-01-01"}},
+    },
+    {
+        "input": "sorceries released in 2023 or later that deal damage",
+        "ir": {
+            "entity": {
+                "card_types": ["sorcery"],
+                "oracle_text_contains": ["damage"],
+            },
+            "release_date": {"op": ">=", "date": "2023-01-01"},
+        },
+    },
+    {
+        "input": "cards named lightning something",
+        "ir": {"entity": {"name_contains": ["lightning"]}},
+    },
+    {
+        "input": "the card called sol ring",
+        "ir": {"name_exact": ["sol ring"]},
+    },
+    {
+        "input": "creatures that say draw a card but not discard",
+        "ir": {
+            "entity": {"card_types": ["creature"]},
+            "oracle_text_exact": ["draw a card"],
+            "oracle_text_not": ["discard"],
+        },
+    },
+    {
+        "input": "flavor text mentioning phyrexia",
+        "ir": {"flavor_text_contains": ["phyrexia"]},
+    },
+    {
+        "input": "cards illustrated by rebecca guay",
+        "ir": {"artist": ["rebecca guay"]},
+    },
+    {
+        "input": "double faced cards in green",
+        "ir": {"colors": {"set": ["G"]}, "layout": ["transform"]},
+    },
+    {
+        "input": "japanese printings of black lotus",
+        "ir": {"name_exact": ["black lotus"], "languages": ["ja"]},
+    },
+    {
+        "input": "borderless old frame artifacts",
+        "ir": {
+            "entity": {"card_types": ["artifact"]},
+            "border": ["borderless"],
+            "frame": ["1993"],
+        },
+    },
+    {
+        "input": "cards with the phyrexian watermark",
+        "ir": {"watermark": ["phyrexian"]},
+    },
+    {
+        "input": "cheapest commander staples under 1 dollar sorted by price",
+        "ir": {
+            "price_usd": {"op": "<", "value": 1},
+            "formats": [{"name": "commander", "legal": True}],
+            "sort": {"by": "usd", "direction": "asc"},
+        },
+    },
+    {
+        "input": "black cards that make zombie tokens",
+        "ir": {
+            "colors": {"set": ["B"]},
+            "entity": {"oracle_text_contains": ["zombie token"]},
+        },
+    },
+    {
+        "input": "2 mana white creatures with flying",
+        "ir": {
+            "entity": {
+                "card_types": ["creature"],
+                "oracle_text_contains": ["flying"],
+            },
+            "mana_value": {"op": "=", "value": 2},
+            "colors": {"mode": "card_color", "set": ["W"]},
+        },
+    },
+    {
+        "input": "snow lands",
+        "ir": {"entity": {"card_types": ["land"], "supertypes": ["snow"]}},
+    },
+]
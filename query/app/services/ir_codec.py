@@ -0,0 +1,84 @@
+"""Compact binary codec for cached IR payloads.
+
+Layout: one version byte, then the payload::
+
+    0x01  msgpack of ``ir.model_dump()`` minus fields equal to their default
+    0x02  zlib-compressed 0x01 payload (used above ``IR_CACHE_COMPRESS_MIN_BYTES``)
+
+Defaults are stripped by diffing against a dump of ``QueryIR()`` and merged
+back before validation; that is several times cheaper than
+``exclude_defaults`` and letting pydantic fill (and copy) the defaults, and
+a typical IR shrinks to a few dozen bytes. Readers dispatch on the version
+byte; entries written as JSON text before this codec (first byte ``{``)
+still decode until they expire.
+"""
+
+from __future__ import annotations
+
+import zlib
+
+import msgpack
+
+from app.core.config import settings
+from app.models import QueryIR
+
+MSGPACK = 0x01
+MSGPACK_ZLIB = 0x02
+
+
+_DEFAULTS = QueryIR().model_dump()
+
+
+def _strip(data: dict, defaults: dict) -> dict:
+    out = {}
+    for key, value in data.items():
+        default = defaults.get(key)
+        if value == default:
+            continue
+        if isinstance(value, dict) and isinstance(default, dict):
+            value = _strip(value, default)
+        out[key] = value
+    return out
+
+
+def _merge(data: dict, defaults: dict) -> dict:
+    # Shallow: validation builds fresh lists, so defaults are never aliased
+    out = dict(defaults)
+    for key, value in data.items():
+        default = defaults.get(key)
+        if isinstance(value, dict) and isinstance(default, dict):
+            value = _merge(value, default)
+        out[key] = value
+    return out
+
+
+class CodecError(ValueError):
+    """Cached bytes are not a known IR encoding."""
+
+
+def encode_ir(ir: QueryIR, compress_min: int | None = None) -> bytes:
+    if compress_min is None:
+        compress_min = settings.ir_cache_compress_min_bytes
+    payload = msgpack.packb(_strip(ir.model_dump(), _DEFAULTS), use_bin_type=True)
+    if 0 < compress_min <= len(payload):
+        packed = zlib.compress(payload, 6)
+        if len(packed) < len(payload):
+            return bytes((MSGPACK_ZLIB,)) + packed
+    return bytes((MSGPACK,)) + payload
+
+
+def decode_ir(raw: bytes) -> QueryIR:
+    if not raw:
+        raise CodecError("empty IR payload")
+    version, payload = raw[0], raw[1:]
+    if version == ord("{"):
+        return QueryIR.model_validate_json(raw)
+    if version == MSGPACK_ZLIB:
+        payload = zlib.decompress(payload)
+    elif version != MSGPACK:
+        raise CodecError(f"unknown IR codec version {version:#04x}")
+    data = msgpack.unpackb(payload, raw=False)
+    return QueryIR.model_validate(_merge(data, _DEFAULTS))
+
+
+__all__ = ["encode_ir", "decode_ir", "CodecError", "MSGPACK", "MSGPACK_ZLIB"]
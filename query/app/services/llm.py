@@ -2,15 +2,24 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import logging
-from openai import OpenAI, OpenAIError
+import time
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, OpenAIError
 from pydantic import ValidationError
 from app.core.config import settings
 from app.models import QueryIR
 from prometheus_client import Counter, Histogram
-from .few_shot_examples import FEW_SHOT
-from .tag_index import suggest_tags, load_index
+from .example_index import select_examples
+from .few_shot_examples import CORE_FEW_SHOT, EXAMPLE_POOL, FEW_SHOT
+from .breaker import CircuitBreakerError, llm_breaker
+from .retry import LatencyTracker, RetryScheduler
+from .tag_cache import Candidates, cached_tag_candidates, tag_candidates
+from .tag_index import load_index
+from .usage import record_attempt
 
 LLM_PARSE_ATTEMPTS = Counter(
     "llm_parse_attempts_total",
@@ -28,126 +37,256 @@ LLM_PARSE_LATENCY = Histogram(
 )
 LLM_FINAL_OUTCOME = Counter(
     "llm_parse_final_outcome_total",
-    "Final outcome after up to 3 attempts",
-    ["outcome"],
+    "Final outcome of the retry budget per request",
+    # reason: none, deadline, attempts_exhausted, circuit_open
+    ["outcome", "attempts", "reason"],
+    namespace="grimoire",
+    subsystem="query",
+)
+
+LLM_HEDGED = Counter(
+    "llm_parse_hedged_total",
+    "Requests where a hedged (second concurrent) LLM attempt was fired",
     namespace="grimoire",
     subsystem="query",
 )
 
 logger = logging.getLogger(__name__)
 
+_client: AsyncOpenAI | None = None
 
-def _build_prompt(user_text: str) -> str:
-    examples = []
-    for ex in FEW_SHOT:
-        examples.append(f"Input: {ex['input']}\nIR JSON: {json.dumps(ex['ir'])}")
-    # Include full Scryfall syntax: art:, atag:, arttag: for art tags; function:, otag:, oracletag: for Oracle tags; flavor:, pow/tou/loy/number, priceusd/priceeur/pricetix;
-    # categorical filters: layout:, lang:, artist:, watermark:, border:, frame:, reprint:.
-    prompt_intro = (
-        "Convert natural language about Magic: The Gathering cards into a strict JSON object matching the QueryIR schema. "
-        "Support Scryfall search syntax including art:, atag:, arttag:, function:, otag:, oracletag:, flavor:, pow/tou/loy/number, priceusd/priceeur/pricetix, layout:, lang:, artist:, watermark:, border:, frame:, reprint:. "
-        "Only output valid JSON, no explanations or prose. Unknown concepts should be ignored."
-    )
-    prompt = prompt_intro + "\n\n" + "\n\n".join(examples)
-    # Candidate tag injection (phase 4) if enabled
-    from app.core.config import settings
 
-    if settings.enable_tag_candidates:
-        art_cand, oracle_cand = suggest_tags(
-            user_text,
-            max_art=settings.tags_max_art,
-            max_oracle=settings.tags_max_oracle,
-            art_threshold=settings.tags_threshold_art,
-            oracle_threshold=settings.tags_threshold_oracle,
+def get_client() -> AsyncOpenAI:
+    """Return the process-wide async OpenAI client (pooled connections)."""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url,
+            timeout=settings.openai_timeout_secs,
+            max_retries=0,  # retries are owned by the RetryScheduler budget
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.openai_max_connections,
+                    max_keepalive_connections=settings.openai_max_connections,
+                )
+            ),
         )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+# Include full Scryfall syntax: art:, atag:, arttag: for art tags; function:, otag:, oracletag: for Oracle tags; flavor:, pow/tou/loy/number, priceusd/priceeur/pricetix;
+# categorical filters: layout:, lang:, artist:, watermark:, border:, frame:, reprint:.
+_PROMPT_INTRO = (
+    "Convert natural language about Magic: The Gathering cards into a strict JSON object matching the QueryIR schema. "
+    "Support Scryfall search syntax including art:, atag:, arttag:, function:, otag:, oracletag:, flavor:, pow/tou/loy/number, priceusd/priceeur/pricetix, layout:, lang:, artist:, watermark:, border:, frame:, reprint:. "
+    "Only output valid JSON, no explanations or prose. Unknown concepts should be ignored. "
+    "If no candidate tag list is shown, do not invent tags; leave art_tags and oracle_tags empty unless obviously implied and widely known."
+)
+
+
+def _render_example(ex: dict) -> str:
+    return f"Input: {ex['input']}\nIR JSON: {json.dumps(ex['ir'])}"
+
+
+# Every pool example rendered once at import, keyed by input
+_RENDERED = {ex["input"]: _render_example(ex) for ex in EXAMPLE_POOL}
+
+
+def _render_examples(examples: list[dict]) -> str:
+    return "\n\n".join(_RENDERED[ex["input"]] for ex in examples)
+
+
+# Static part of every prompt, built once: instructions + CORE_FEW_SHOT.
+# Similarity-selected examples (FEW_SHOT_K > 0), tag candidates and the input
+# are appended after it. Kept small: the whole prompt stays under the
+# provider's 1024-token prompt-caching minimum, so every token is billed.
+PROMPT_PREFIX = _PROMPT_INTRO + "\n\n" + _render_examples(CORE_FEW_SHOT)
+# Routes requests sharing the prefix to the same provider cache shard
+PROMPT_CACHE_KEY = "nlq-parse-" + hashlib.sha1(PROMPT_PREFIX.encode()).hexdigest()[:12]
+
+
+_ART_CANDIDATES = (
+    "Candidate art_tags (choose zero or more ONLY from this list; omit if unsure):\n"
+)
+_ORACLE_CANDIDATES = (
+    "Candidate oracle_tags (choose zero or more ONLY from this list; omit if unsure):\n"
+)
+
+# Bump when parsing changes in a way the inputs hashed below don't capture
+PARSER_REVISION = 2
+# Everything except the tag set that decides what the LLM returns for a text
+_PARSER_INPUTS = hashlib.sha1(
+    json.dumps(
+        [
+            PARSER_REVISION,
+            settings.openai_model,
+            _PROMPT_INTRO,
+            _ART_CANDIDATES,
+            _ORACLE_CANDIDATES,
+            FEW_SHOT,
+            CORE_FEW_SHOT,
+            EXAMPLE_POOL,
+            settings.few_shot_k,
+            settings.enable_tag_candidates,
+            settings.tags_max_art,
+            settings.tags_max_oracle,
+            settings.tags_threshold_art,
+            settings.tags_threshold_oracle,
+            QueryIR.model_json_schema(),
+        ],
+        sort_keys=True,
+    ).encode()
+).hexdigest()
+
+
+def parser_fingerprint() -> str:
+    """Short hash of the model, prompt, examples, schema and tag set.
+
+    Namespaces cached IR: any change yields a new fingerprint, so old parses
+    are never read as current ones.
+    """
+    digest = load_index().digest
+    return hashlib.sha1((_PARSER_INPUTS + digest).encode()).hexdigest()[:12]
+
+
+def _build_prompt(
+    user_text: str,
+    few_shot_k: int | None = None,
+    candidates: Candidates | None = None,
+) -> str:
+    k = settings.few_shot_k if few_shot_k is None else few_shot_k
+    prompt = PROMPT_PREFIX
+    if k > 0:
+        # Plus the k non-core pool examples lexically closest to this input
+        prompt += "\n\n" + _render_examples(select_examples(user_text, k))
+    # Candidate tag injection (phase 4) if enabled
+    if settings.enable_tag_candidates:
+        art_cand, oracle_cand = candidates or tag_candidates(user_text)
         blocks = []
         if art_cand:
-            blocks.append(
-                "Candidate art_tags (choose zero or more ONLY from this list; omit if unsure):\n"
-                + ", ".join(art_cand)
-            )
+            blocks.append(_ART_CANDIDATES + ", ".join(art_cand))
         if oracle_cand:
-            blocks.append(
-                "Candidate oracle_tags (choose zero or more ONLY from this list; omit if unsure):\n"
-                + ", ".join(oracle_cand)
-            )
+            blocks.append(_ORACLE_CANDIDATES + ", ".join(oracle_cand))
         if blocks:
-            prompt += "\n\n" + "\n" + "\n".join(blocks)
-        else:
-            prompt += "\n\nIf no candidate tag list is shown, do not invent tags; leave art_tags and oracle_tags empty unless obviously implied and widely known."
+            prompt += "\n\n" + "\n".join(blocks)
     prompt += f"\nInput: {user_text}\nIR JSON:"
     return prompt
 
 
-def llm_parse(text: str) -> QueryIR | None:
-    prompt = _build_prompt(text)
-    client: OpenAI | None = None
-    for attempt in range(1, 4):
-        try:
-            if client is None:
-                client = OpenAI(api_key=settings.openai_api_key)
-            import time
-
-            t0 = time.perf_counter()
-            resp = client.responses.parse(
-                model=settings.openai_model,
-                input=[{"role": "user", "content": prompt}],
-                text_format=QueryIR,
-                temperature=0.0,
-            )
-            LLM_PARSE_LATENCY.observe(time.perf_counter() - t0)
-            parsed = getattr(resp, "output_parsed", None)
-            if parsed:
-                # Post-parse defense: remove any tags not in whitelist & note if trimmed
-                idx = load_index()
-                original_art = set(parsed.art_tags)
-                original_oracle = set(parsed.oracle_tags)
-                filtered_art = [t for t in parsed.art_tags if t in idx.art_tags]
-                filtered_oracle = [
-                    t for t in parsed.oracle_tags if t in idx.oracle_tags
-                ]
-                if len(filtered_art) != len(parsed.art_tags):
-                    logger.debug(
-                        "Removed %d unknown art_tags: %s",
-                        len(original_art - set(filtered_art)),
-                        sorted(original_art - set(filtered_art)),
-                    )
-                    parsed.art_tags = filtered_art  # type: ignore
-                if len(filtered_oracle) != len(parsed.oracle_tags):
-                    logger.debug(
-                        "Removed %d unknown oracle_tags: %s",
-                        len(original_oracle - set(filtered_oracle)),
-                        sorted(original_oracle - set(filtered_oracle)),
-                    )
-                    parsed.oracle_tags = filtered_oracle  # type: ignore
-                if attempt > 1:
-                    logger.info("LLM parse succeeded on attempt %d", attempt)
-                LLM_PARSE_ATTEMPTS.labels("success").inc()
-                return parsed
-            logger.warning(
-                "LLM parse attempt %d produced no parsed output (possible refusal)",
-                attempt,
-            )
-            LLM_PARSE_ATTEMPTS.labels("failure").inc()
-        except (OpenAIError, ValidationError, json.JSONDecodeError, TypeError) as e:
-            logger.warning("LLM parse attempt %d failed: %s", attempt, e)
-            LLM_PARSE_ATTEMPTS.labels("exception").inc()
+def _filter_tags(parsed: QueryIR) -> QueryIR:
+    # Post-parse defense: remove any tags not in whitelist & note if trimmed
+    idx = load_index()
+    original_art = set(parsed.art_tags)
+    original_oracle = set(parsed.oracle_tags)
+    filtered_art = [t for t in parsed.art_tags if t in idx.art_tags]
+    filtered_oracle = [t for t in parsed.oracle_tags if t in idx.oracle_tags]
+    if len(filtered_art) != len(parsed.art_tags):
+        logger.debug(
+            "Removed %d unknown art_tags: %s",
+            len(original_art - set(filtered_art)),
+            sorted(original_art - set(filtered_art)),
+        )
+        parsed.art_tags = filtered_art  # type: ignore
+    if len(filtered_oracle) != len(parsed.oracle_tags):
+        logger.debug(
+            "Removed %d unknown oracle_tags: %s",
+            len(original_oracle - set(filtered_oracle)),
+            sorted(original_oracle - set(filtered_oracle)),
+        )
+        parsed.oracle_tags = filtered_oracle  # type: ignore
+    return parsed
+
+
+@llm_breaker
+async def _call_llm(prompt: str, timeout: float):
+    return await get_client().responses.parse(
+        model=settings.openai_model,
+        input=[{"role": "user", "content": prompt}],
+        text_format=QueryIR,
+        temperature=0.0,
+        timeout=min(timeout, settings.openai_timeout_secs),
+        prompt_cache_key=PROMPT_CACHE_KEY,
+    )
+
+
+async def llm_parse(prompt: str, timeout: float) -> QueryIR | None:
+    """Single LLM parse attempt; returns None on failure (never raises)."""
+    t0 = time.perf_counter()
+    resp = None
+    try:
+        resp = await _call_llm(prompt, timeout)
+        LLM_PARSE_LATENCY.observe(time.perf_counter() - t0)
+        record_attempt(settings.openai_model, resp, time.perf_counter() - t0)
+        parsed = getattr(resp, "output_parsed", None)
+        if parsed:
+            LLM_PARSE_ATTEMPTS.labels("success").inc()
+            return _filter_tags(parsed)
+        logger.warning("LLM parse attempt produced no parsed output (possible refusal)")
+        LLM_PARSE_ATTEMPTS.labels("failure").inc()
+    except CircuitBreakerError:
+        LLM_PARSE_ATTEMPTS.labels("circuit_open").inc()
+    except (OpenAIError, ValidationError, json.JSONDecodeError, TypeError) as e:
+        logger.warning("LLM parse attempt failed: %s", e)
+        if resp is None:
+            # Failed attempts still cost wall time (and count towards the request)
+            record_attempt(settings.openai_model, None, time.perf_counter() - t0)
+        LLM_PARSE_ATTEMPTS.labels("exception").inc()
     return None
 
 
-def parse_nl_query(text: str) -> tuple[QueryIR, list[str]]:
+_latency = LatencyTracker(min_samples=settings.llm_hedge_min_samples)
+
+
+def _scheduler() -> RetryScheduler:
+    return RetryScheduler(
+        budget_secs=settings.llm_budget_secs,
+        max_attempts=settings.llm_max_attempts,
+        backoff_base_secs=settings.llm_backoff_base_ms / 1000,
+        tracker=_latency if settings.llm_hedge else None,
+        # Breaker opened mid-request: remaining attempts would be rejected
+        abort=lambda: "circuit_open" if llm_breaker.opened else None,
+    )
+
+
+async def parse_nl_query(
+    text: str, candidates: Candidates | None = None
+) -> tuple[QueryIR | None, list[str]]:
+    """Parse ``text`` with the LLM inside one deadline-bounded retry budget.
+
+    ``candidates`` are precomputed (art, oracle) tag candidates; otherwise
+    they come from the shared tag candidate cache. Returns (None, warnings) when the budget or
+    attempts run out, or the circuit breaker opens.
+    """
     warnings: list[str] = []
-    ir: QueryIR | None = None
-    for attempt in range(3):
-        ir = llm_parse(text)
-        if ir:
-            LLM_FINAL_OUTCOME.labels("success").inc()
-            break
-        warnings.append(f"LLM parsing attempt {attempt} failed")
-    if not ir:
-        warnings.append("LLM parsing failed after 3 attempts; returning None")
-        LLM_FINAL_OUTCOME.labels("failed").inc()
-    return ir, warnings
-
-
-__all__ = ["parse_nl_query"]
+    if llm_breaker.opened:
+        # Degraded mode: never block on a provider we know is down
+        warnings.append("LLM unavailable (circuit open); returning best-effort result")
+        LLM_FINAL_OUTCOME.labels("failed", "0", "circuit_open").inc()
+        return None, warnings
+    if candidates is None and settings.enable_tag_candidates:
+        candidates = await cached_tag_candidates(text)
+    prompt = await asyncio.to_thread(_build_prompt, text, None, candidates)
+    outcome = await _scheduler().run(lambda timeout: llm_parse(prompt, timeout))
+    if outcome.hedged:
+        LLM_HEDGED.inc()
+    if outcome.result is not None:
+        if outcome.attempts > 1:
+            logger.info("LLM parse succeeded after %d attempts", outcome.attempts)
+        LLM_FINAL_OUTCOME.labels("success", str(outcome.attempts), "none").inc()
+        return outcome.result, warnings
+    warnings.append(
+        f"LLM parsing failed after {outcome.attempts} attempt(s) ({outcome.reason})"
+    )
+    LLM_FINAL_OUTCOME.labels("failed", str(outcome.attempts), outcome.reason).inc()
+    return None, warnings
+
+
+__all__ = ["parse_nl_query", "parser_fingerprint", "get_client", "close_client"]
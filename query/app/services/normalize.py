@@ -0,0 +1,108 @@
+"""Canonical text normalization applied before cache key derivation.
+
+Spelling variants of the same request ("Mono-White Angels cmc <= 5",
+"mono white angels mv<=5") collapse onto one canonical string so they share
+a single cache entry and LLM call. Only spelling and layout are normalized;
+nothing that the parser could read differently (word order, connectives)
+is touched:
+- Unicode NFKC + case folding, unicode comparison glyphs (≤, ≥) to ASCII
+- hyphens between words become spaces (dates like 2021-01-01 are kept)
+- spacing around comparison operators is removed ("mv <= 5" -> "mv<=5")
+- field synonyms in comparisons (cmc, mana value -> mv; power -> pow; ...)
+- commas/semicolons as separators, whitespace collapse and trailing punctuation strip
+- runs of adjacent comparison atoms (``field<op>value``) are sorted, unless a
+  connective or negation (``or``, ``not``, ``without``, a parenthesis ...)
+  sits directly before or after the run: there the order decides which atom
+  it applies to. An atom never moves past a word.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from functools import lru_cache
+
+_GLYPHS = {"≤": "<=", "≥": ">=", "≠": "!=", "–": "-", "—": "-"}
+_WORD_HYPHEN_RE = re.compile(r"(?<=[a-z])-(?=[a-z])")
+_OP_SPACING_RE = re.compile(r"\s*(<=|>=|!=|=|<|>)\s*")
+_SEPARATOR_RE = re.compile(r"[,;]")
+_WS_RE = re.compile(r"\s+")
+_TRAILING_PUNCT_RE = re.compile(r"[\s.,;!?]+$")
+
+# Multi-word field names are folded first so the operator regex sees one token
+_FIELD_PHRASES = {
+    "converted mana cost": "mv",
+    "mana value": "mv",
+    "mana cost": "mv",
+}
+_FIELD_SYNONYMS = {
+    "cmc": "mv",
+    "manavalue": "mv",
+    "power": "pow",
+    "toughness": "tou",
+    "loyalty": "loy",
+    "price": "usd",
+    "colour": "c",
+    "color": "c",
+    "identity": "id",
+}
+_WORD_SYNONYMS = {"colour": "color", "colours": "colors", "colourless": "colorless"}
+
+_PHRASE_RE = re.compile(
+    r"\b("
+    + "|".join(re.escape(p) for p in _FIELD_PHRASES)
+    + r")(?=\s*(?:<=|>=|!=|=|<|>))"
+)
+# Words that bind to the neighbouring atom ("not pow>5", "mv<2 or ...")
+_CONNECTIVES = {"or", "nor", "not", "no", "non", "but"}
+_CONNECTIVES |= {"without", "except", "excluding"}
+_ATOM_RE = re.compile(r"^([a-z]+)(<=|>=|!=|=|<|>)([^\s()]+)$")
+
+
+def _binds(word: str | None) -> bool:
+    return word is not None and (word in _CONNECTIVES or "(" in word or ")" in word)
+
+
+def _fold_atom(token: str) -> str | None:
+    m = _ATOM_RE.match(token)
+    if not m:
+        return None
+    field, op, value = m.groups()
+    return f"{_FIELD_SYNONYMS.get(field, field)}{op}{value}"
+
+
+@lru_cache(maxsize=4096)
+def canonicalize(text: str) -> str:
+    """Return the canonical form of ``text`` used for cache keys and parsing."""
+    s = unicodedata.normalize("NFKC", text).casefold()
+    for glyph, repl in _GLYPHS.items():
+        s = s.replace(glyph, repl)
+    s = _WORD_HYPHEN_RE.sub(" ", s)
+    s = _SEPARATOR_RE.sub(" ", s)
+    s = _WS_RE.sub(" ", s).strip()
+    s = _PHRASE_RE.sub(lambda m: _FIELD_PHRASES[m.group(1)], s)
+    s = _OP_SPACING_RE.sub(r"\1", s)
+    s = _TRAILING_PUNCT_RE.sub("", s)
+    out: list[str] = []
+    run: list[str] = []  # adjacent atoms, flushed when a word ends the run
+    before: str | None = None  # word preceding the run
+
+    def flush(after: str | None):
+        out.extend(run if _binds(before) or _binds(after) else sorted(run))
+        run.clear()
+
+    for tok in s.split(" "):
+        if not tok:
+            continue
+        atom = _fold_atom(tok)
+        if atom is not None:
+            run.append(atom)
+            continue
+        flush(tok)
+        before = _WORD_SYNONYMS.get(tok, tok)
+        out.append(before)
+    flush(None)
+    return " ".join(out)
+
+
+__all__ = ["canonicalize"]
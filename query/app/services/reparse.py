@@ -0,0 +1,101 @@
+"""Background re-parse of the previous parser namespace's hottest texts.
+
+Cached IR is namespaced by ``cache.parser_version()``; after a deploy or a
+tag reload changes it, lookups that miss the new namespace fall back to the
+previous one, so old parses keep serving. This job walks the previous
+namespace's hot set (texts ranked by Redis hits) and LLM-parses the top
+``REPARSE_TOP_N`` into the new namespace at ``REPARSE_RPS``, after which
+those texts stop falling back. A Redis lock keeps it to one replica per
+namespace; a replica that takes over after a crash skips texts already done.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+from . import cache, singleflight, usage
+from .llm import parse_nl_query
+
+logger = logging.getLogger(__name__)
+
+REPARSE_ITEMS = Counter(
+    "reparse_items_total",
+    "Hot texts handled by the namespace re-parse job",
+    ["result"],  # result: parsed, skipped, failed
+    namespace="grimoire",
+    subsystem="query",
+)
+
+LOCK_TTL_MS = 60_000
+
+
+async def run():
+    """Re-parse hot texts of the previous namespace into the current one."""
+    if settings.reparse_top_n <= 0 or settings.reparse_rps <= 0:
+        return
+    previous = await cache.previous_parser_version()
+    current = cache.parser_version()
+    if previous is None:
+        return
+    token = uuid.uuid4().hex
+    if not await cache.acquire_reparse_lock(current, token, LOCK_TTL_MS):
+        return  # another replica owns this namespace's re-parse
+    t0 = time.perf_counter()
+    llm_usage = usage.start_request()
+    counts = {"parsed": 0, "skipped": 0, "failed": 0}
+    interval = 1 / settings.reparse_rps
+    try:
+        for text, _ in await cache.hot_texts(previous, settings.reparse_top_n):
+            if cache.parser_version() != current:
+                break  # superseded (e.g. another tag reload); the next run takes over
+            if await cache.has_ir(text):
+                result = "skipped"
+            else:
+                # Coalesces with live requests for the same text
+                ir, _ = await singleflight.parse_once(text, parse_nl_query)
+                result = "parsed" if ir is not None else "failed"
+                await asyncio.sleep(interval)
+            counts[result] += 1
+            REPARSE_ITEMS.labels(result).inc()
+            if not await cache.extend_reparse_lock(current, token, LOCK_TTL_MS):
+                logger.warning("Lost re-parse lock for namespace %s", current)
+                break
+    finally:
+        await cache.release_reparse_lock(current, token)
+    logger.info(
+        "Re-parse p%s -> p%s: %s secs=%.1f %s",
+        previous,
+        current,
+        " ".join(f"{k}={v}" for k, v in counts.items()),
+        time.perf_counter() - t0,
+        llm_usage.log_fields(),
+    )
+
+
+async def run_safely():
+    """``run`` for background tasks: failures are logged, never raised."""
+    try:
+        await run()
+    except asyncio.CancelledError:
+        raise
+    except Exception:  # noqa
+        logger.exception("Namespace re-parse failed")
+
+
+_tasks: set[asyncio.Task] = set()
+
+
+def schedule():
+    """Start ``run_safely`` in the background (e.g. after a tag reload)."""
+    task = asyncio.create_task(run_safely())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+__all__ = ["run", "run_safely", "schedule", "REPARSE_ITEMS"]
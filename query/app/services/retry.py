@@ -0,0 +1,132 @@
+"""Deadline-aware retry scheduler with jittered backoff and hedged attempts.
+
+One scheduler owns every retry for a request: attempts share a single time
+budget, failed attempts back off with full jitter, and an attempt that runs
+longer than the observed p95 latency gets a hedge (a second concurrent
+attempt); whichever succeeds first wins and the other is cancelled.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+# attempt(timeout_secs) -> result, or None for a failed attempt
+Attempt = Callable[[float], Awaitable["T | None"]]
+# abort() -> reason to stop retrying after a failed attempt, or None
+Abort = Callable[[], "str | None"]
+
+
+class LatencyTracker:
+    """Rolling window of successful attempt latencies (for the hedge trigger)."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self._samples: deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def observe(self, secs: float):
+        self._samples.append(secs)
+
+    def p95(self) -> float | None:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+@dataclass
+class RetryOutcome(Generic[T]):
+    result: T | None
+    attempts: int
+    # success | deadline | attempts_exhausted | abort() reason
+    reason: str
+    hedged: bool = False
+
+
+class RetryScheduler:
+    def __init__(
+        self,
+        budget_secs: float,
+        max_attempts: int,
+        backoff_base_secs: float,
+        tracker: LatencyTracker | None = None,
+        abort: Abort | None = None,
+    ):
+        self.budget_secs = budget_secs
+        self.max_attempts = max_attempts
+        self.backoff_base_secs = backoff_base_secs
+        self.tracker = tracker
+        self.abort = abort
+
+    async def run(self, attempt: Attempt[T]) -> RetryOutcome[T]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.budget_secs
+        used = 0
+        hedged = False
+        while used < self.max_attempts:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return RetryOutcome(None, used, "deadline", hedged)
+            result, n, did_hedge = await self._round(attempt, deadline, used)
+            used += n
+            hedged = hedged or did_hedge
+            if result is not None:
+                return RetryOutcome(result, used, "success", hedged)
+            # A retry that is known to fail instantly is not worth the backoff
+            reason = self.abort() if self.abort else None
+            if reason is not None:
+                return RetryOutcome(None, used, reason, hedged)
+            if used >= self.max_attempts:
+                break
+            # Full jitter: sleep U(0, base * 2^k), never past the deadline
+            backoff = random.uniform(0, self.backoff_base_secs * 2 ** (used - 1))
+            remaining = deadline - loop.time()
+            if backoff >= remaining:
+                return RetryOutcome(None, used, "deadline", hedged)
+            await asyncio.sleep(backoff)
+        return RetryOutcome(None, used, "attempts_exhausted", hedged)
+
+    async def _round(
+        self, attempt: Attempt[T], deadline: float, used: int
+    ) -> tuple[T | None, int, bool]:
+        """Run one attempt, hedging it once if it outlives the observed p95."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        tasks = {asyncio.ensure_future(attempt(deadline - started))}
+        n = 1
+        hedge_after = self.tracker.p95() if self.tracker else None
+        can_hedge = hedge_after is not None and used + 1 < self.max_attempts
+        try:
+            if can_hedge:
+                done, _ = await asyncio.wait(
+                    tasks, timeout=min(hedge_after, max(0.0, deadline - started))
+                )
+                if not done and loop.time() < deadline:
+                    tasks.add(asyncio.ensure_future(attempt(deadline - loop.time())))
+                    n = 2
+            while tasks:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                done, tasks = await asyncio.wait(
+                    tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for t in done:
+                    if not t.cancelled() and t.exception() is None:
+                        result = t.result()
+                        if result is not None:
+                            if self.tracker:
+                                self.tracker.observe(loop.time() - started)
+                            return result, n, n > 1
+            return None, n, n > 1
+        finally:
+            for t in tasks:
+                t.cancel()
+
+
+__all__ = ["RetryScheduler", "RetryOutcome", "LatencyTracker"]
@@ -0,0 +1,113 @@
+"""Single-flight coalescing of identical in-flight NL parses.
+
+Two layers, both keyed on ``cache.text_key(text)``:
+- In-process: concurrent misses on one worker share a single asyncio future.
+- Cross-replica: the local leader takes a short-lived Redis lease; leaders on
+  other replicas that find the lease taken poll the IR cache for its result
+  instead of calling the LLM themselves.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.models import QueryIR
+from . import cache
+
+ParseResult = tuple[QueryIR | None, list[str]]
+
+SINGLEFLIGHT_OUTCOMES = Counter(
+    "singleflight_outcomes_total",
+    "How a cache-miss parse was satisfied",
+    # role: leader, local_follower, remote_follower, lease_timeout, error (no lease)
+    ["role"],
+    namespace="grimoire",
+    subsystem="query",
+)
+
+logger = logging.getLogger(__name__)
+
+_inflight: dict[str, asyncio.Task[ParseResult]] = {}
+
+
+async def _wait_for_remote(text: str) -> QueryIR | None:
+    """Poll the IR cache while another replica holds the lease."""
+    deadline = time.monotonic() + settings.parse_lease_ms / 1000
+    interval = settings.parse_lease_poll_ms / 1000
+    while time.monotonic() < deadline:
+        await asyncio.sleep(interval)
+        ir = await cache.get_ir_for_text(text)
+        if ir is not None:
+            return ir
+        if not await cache.lease_held(text):
+            # Leader finished without caching (failure) or its lease expired
+            return await cache.get_ir_for_text(text)
+    return None
+
+
+async def _lead(
+    text: str, produce: Callable[[str], Awaitable[ParseResult]]
+) -> ParseResult:
+    token: str | None = uuid.uuid4().hex
+    try:
+        leased = await cache.acquire_lease(text, token)
+    except cache.REDIS_ERRORS as e:
+        # Redis down: parse here without a lease (no cross-replica coalescing)
+        SINGLEFLIGHT_OUTCOMES.labels("error").inc()
+        logger.warning("Failed to take parse lease; parsing locally: %s", e)
+        token = None
+    else:
+        if not leased:
+            ir = await _wait_for_remote(text)
+            if ir is not None:
+                SINGLEFLIGHT_OUTCOMES.labels("remote_follower").inc()
+                return ir, []
+            SINGLEFLIGHT_OUTCOMES.labels("lease_timeout").inc()
+            logger.info("Remote parse lease not resolved; parsing locally")
+            token = None
+        else:
+            SINGLEFLIGHT_OUTCOMES.labels("leader").inc()
+    try:
+        ir, warnings = await produce(text)
+        if ir is not None:
+            await cache.cache_ir(text, ir)
+        return ir, warnings
+    finally:
+        if token is not None:
+            await cache.release_lease(text, token)
+
+
+async def parse_once(
+    text: str, produce: Callable[[str], Awaitable[ParseResult]]
+) -> ParseResult:
+    """Run ``produce(text)`` at most once across concurrent identical requests.
+
+    The leader writes the IR to the cache before releasing its lease, so
+    followers on other replicas can pick it up from Redis.
+    """
+    key = cache.text_key(text)
+    task = _inflight.get(key)
+    if task is None:
+        # Run as a task so a disconnecting leader doesn't cancel its followers
+        task = asyncio.create_task(_lead(text, produce))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _forget(key, t))
+    else:
+        SINGLEFLIGHT_OUTCOMES.labels("local_follower").inc()
+    ir, warnings = await asyncio.shield(task)
+    return ir, list(warnings)
+
+
+def _forget(key: str, task: asyncio.Task[ParseResult]):
+    if _inflight.get(key) is task:
+        del _inflight[key]
+
+
+__all__ = ["parse_once"]
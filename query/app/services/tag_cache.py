@@ -0,0 +1,146 @@
+"""Two-tier cache for tag candidates: per-worker LRU over shared Redis entries.
+
+Fuzzy tag scoring is the costliest CPU step of a cache miss and its result
+only depends on the canonical text, the configured limits/thresholds and
+the tag set, so it is cached fleet-wide. Keys carry the tag-index digest:
+after a tag reload old entries simply stop matching.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+from . import cache
+from .tag_index import load_index, suggest_tags_batch
+
+Candidates = tuple[list[str], list[str]]  # (art, oracle)
+
+logger = logging.getLogger(__name__)
+
+TAG_CACHE_LOOKUPS = Counter(
+    "tag_cache_lookups_total",
+    "Tag candidate cache lookups per tier",
+    ["tier", "result"],  # tier: local, redis
+    namespace="grimoire",
+    subsystem="query",
+)
+
+
+def _params() -> tuple[int, int, int, int]:
+    return (
+        settings.tags_max_art,
+        settings.tags_max_oracle,
+        settings.tags_threshold_art,
+        settings.tags_threshold_oracle,
+    )
+
+
+def batch_tag_candidates(texts: list[str]) -> list[Candidates]:
+    """Configured candidates for many texts, scored in one pass (uncached)."""
+    max_art, max_oracle, art_threshold, oracle_threshold = _params()
+    return suggest_tags_batch(
+        texts,
+        max_art=max_art,
+        max_oracle=max_oracle,
+        art_threshold=art_threshold,
+        oracle_threshold=oracle_threshold,
+    )
+
+
+def tag_candidates(user_text: str) -> Candidates:
+    """Configured (art, oracle) tag candidates offered to the LLM (uncached)."""
+    return batch_tag_candidates([user_text])[0]
+
+
+class _LRU:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[tuple, Candidates] = OrderedDict()
+
+    def get(self, key: tuple) -> Candidates | None:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key: tuple, value: Candidates):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+_local = _LRU(settings.tag_cache_size)
+
+
+async def cached_tag_candidates_many(texts: list[str]) -> list[Candidates]:
+    """Candidates for canonical ``texts``: local LRU, then Redis, then scoring.
+
+    Redis is read with one MGET and written with one pipeline; all misses
+    are scored together off the event loop.
+    """
+    params = _params()
+    digest = load_index().digest
+    out: list[Candidates | None] = []
+    pending: dict[str, list[int]] = {}
+    for i, text in enumerate(texts):
+        hit = _local.get((digest, params, text))
+        TAG_CACHE_LOOKUPS.labels("local", "hit" if hit is not None else "miss").inc()
+        out.append(hit)
+        if hit is None:
+            pending.setdefault(text, []).append(i)
+    if not pending:
+        return out  # type: ignore[return-value]
+
+    keys = {text: cache.tag_candidates_key(text, params) for text in pending}
+    misses: list[str] = []
+    try:
+        raws = await cache.get_tag_candidates(list(keys.values()))
+    except cache.REDIS_ERRORS as e:
+        # Redis down: score everything the local LRU doesn't have
+        TAG_CACHE_LOOKUPS.labels("redis", "error").inc(len(keys))
+        logger.warning("Redis read failed, scoring tag candidates uncached: %s", e)
+        raws = [None] * len(keys)
+    else:
+        for raw in raws:
+            TAG_CACHE_LOOKUPS.labels("redis", "hit" if raw else "miss").inc()
+    for text, raw in zip(keys, raws):
+        if raw:
+            art, oracle = json.loads(raw)
+            _store(digest, params, text, (art, oracle), pending, out)
+        else:
+            misses.append(text)
+
+    if misses:
+        scored = await asyncio.to_thread(batch_tag_candidates, misses)
+        fresh = {}
+        for text, value in zip(misses, scored):
+            _store(digest, params, text, value, pending, out)
+            fresh[keys[text]] = json.dumps(value)
+        await cache.cache_tag_candidates(fresh)
+    return out  # type: ignore[return-value]
+
+
+def _store(digest, params, text, value: Candidates, pending, out):
+    _local.put((digest, params, text), value)
+    for i in pending[text]:
+        out[i] = value
+
+
+async def cached_tag_candidates(text: str) -> Candidates:
+    return (await cached_tag_candidates_many([text]))[0]
+
+
+__all__ = [
+    "Candidates",
+    "tag_candidates",
+    "batch_tag_candidates",
+    "cached_tag_candidates",
+    "cached_tag_candidates_many",
+]
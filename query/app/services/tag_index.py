@@ -8,12 +8,17 @@ Assumptions:
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
+import hashlib
 import json
 import logging
 import re
-from functools import lru_cache
-from typing import Iterable, List, Tuple
+import threading
+from collections import Counter
+from typing import Iterable, List, Sequence, Tuple
+
+from prometheus_client import Histogram
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +34,19 @@ WORD_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)?", re.IGNORECASE)
 STOPWORDS = {"the", "a", "an", "of", "and", "or", "to", "in", "on", "for", "with"}
 
 try:
-    from rapidfuzz import fuzz
+    import numpy as np
+    from rapidfuzz import fuzz, process
 except ImportError:  # pragma: no cover - fallback path
     fuzz = None  # type: ignore
-    logger.warning("rapidfuzz not installed; falling back to simple scoring")
+    logger.warning("rapidfuzz/numpy not installed; falling back to simple scoring")
+
+TAG_PAIRS_SCORED = Histogram(
+    "tag_pairs_scored",
+    "(term, tag) pairs fuzzy-scored per suggestion after pruning",
+    buckets=(100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000),
+    namespace="grimoire",
+    subsystem="query",
+)
 
 
 def _simple_ratio(a: str, b: str) -> int:
@@ -54,21 +68,165 @@ def _score(a: str, b: str) -> int:
     return _simple_ratio(a, b)
 
 
+_SEP_RE = re.compile(r"[\s\-]")
+_PHRASE_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _chars(text: str) -> set[str]:
+    """Distinct characters of ``text`` (whitespace and hyphen treated alike)."""
+    return set(_SEP_RE.sub("-", text))
+
+
+def _wratio_bound(
+    overlap: "np.ndarray",
+    la: int,
+    la_set: int,
+    lb: "np.ndarray",
+    lb_set: "np.ndarray",
+) -> "np.ndarray":
+    """Upper bound (0-1) of ``fuzz.WRatio`` for strings that share no whole token.
+
+    Every WRatio component is an Indel ratio ``2 * lcs / (len1 + len2)``
+    between the two strings, a window of the longer one, or their re-joined
+    token lists, and the LCS never exceeds ``overlap`` (characters the two
+    strings can have in common). ``*_set`` are the lengths of the joined
+    de-duplicated tokens, never longer than the strings themselves.
+    """
+    short = np.maximum(np.minimum(lb, la), 1)
+    len_ratio = np.maximum(lb, la) / short
+    bound = 2 * overlap / (la + lb)  # ratio
+    # Near-equal lengths: token_sort / token_set ratio, scaled by 0.95
+    token = 0.95 * 2 * overlap / np.maximum(la_set + lb_set, 1)
+    # Otherwise partial_ratio and partial_token_ratio (windows of the shorter's length)
+    scale = np.where(len_ratio < 8, 0.9, 0.6)
+    lcs = np.minimum(overlap, short)
+    partial = scale * 2 * lcs / (short + lcs)
+    short_set = np.maximum(np.minimum(lb_set, la_set), 1)
+    lcs = np.minimum(overlap, short_set)
+    partial_token = 0.95 * scale * 2 * lcs / (short_set + lcs)
+    return np.where(
+        len_ratio < 1.5,
+        np.maximum(bound, token),
+        np.maximum(bound, np.maximum(partial, partial_token)),
+    )
+
+
+def _token_set_len(text: str) -> int:
+    return len(" ".join(set(text.split())))
+
+
+@dataclass(frozen=True)
+class TagSet:
+    """Sorted tags plus the lookup structures used to prune fuzzy scoring.
+
+    ``postings[offsets[r]:offsets[r + 1]]`` are the ids (positions in
+    ``tags``) of tags containing the character on row ``r = gram_rows[char]``.
+    ``phrases`` is a word-level trie over multi-word tags; the ``""`` key
+    marks the end of a tag and holds its id.
+    """
+
+    tags: tuple[str, ...]
+    gram_rows: dict[str, int]
+    offsets: "np.ndarray"
+    postings: "np.ndarray"
+    phrases: dict
+
+    @cached_property
+    def _shape(self) -> tuple["np.ndarray", "np.ndarray", dict[str, list[int]]]:
+        # Tag lengths, joined de-duplicated token lengths, whole token -> ids
+        tokens: dict[str, list[int]] = {}
+        for i, tag in enumerate(self.tags):
+            for tok in set(tag.split()):
+                tokens.setdefault(tok, []).append(i)
+        return (
+            np.fromiter(map(len, self.tags), dtype=np.float64, count=len(self.tags)),
+            np.fromiter(
+                map(_token_set_len, self.tags), dtype=np.float64, count=len(self.tags)
+            ),
+            tokens,
+        )
+
+    def candidates(self, term: str, threshold: float) -> "np.ndarray":
+        """Ids of every tag whose WRatio against ``term`` can reach ``threshold``.
+
+        Exact, not a heuristic: a tag is skipped only if ``_wratio_bound``
+        (from the characters it shares with ``term``) is below ``threshold``.
+        """
+        lengths, set_lengths, tokens = self._shape
+        # Term characters (with their count in the term) present in each tag
+        overlap = np.zeros(len(self.tags), dtype=np.float64)
+        for ch, n in Counter(_SEP_RE.sub("-", term)).items():
+            r = self.gram_rows.get(ch)
+            if r is not None:
+                overlap[self.postings[self.offsets[r] : self.offsets[r + 1]]] += n
+        overlap = np.minimum(overlap, lengths)
+        bound = _wratio_bound(
+            overlap, len(term), _token_set_len(term), lengths, set_lengths
+        )
+        keep = bound * 100 >= threshold - 1e-6
+        # A shared whole token scores 100 through the token ratios
+        for tok in set(term.split()):
+            keep[tokens.get(tok, [])] = True
+        return np.flatnonzero(keep).astype(np.int32)
+
+    def phrase_hits(self, text: str) -> list[int]:
+        """Ids of multi-word tags appearing verbatim (as whole words) in ``text``."""
+        words = _PHRASE_WORD_RE.findall(text.lower())
+        hits = []
+        for start in range(len(words)):
+            node = self.phrases
+            for w in words[start:]:
+                node = node.get(w)
+                if node is None:
+                    break
+                if "" in node:
+                    hits.append(node[""])
+        return hits
+
+
+def _build_phrases(tags: Sequence[str]) -> dict:
+    phrases: dict = {}
+    for i, tag in enumerate(tags):
+        words = _PHRASE_WORD_RE.findall(tag)
+        if len(words) > 1:
+            node = phrases
+            for w in words:
+                node = node.setdefault(w, {})
+            node.setdefault("", i)
+    return phrases
+
+
+def _build_tagset(tags: Iterable[str]) -> TagSet:
+    ordered = tuple(sorted(tags))
+    by_gram: dict[str, list[int]] = {}
+    for i, tag in enumerate(ordered):
+        for g in _chars(tag):
+            by_gram.setdefault(g, []).append(i)
+    gram_rows = {g: r for r, g in enumerate(by_gram)}
+    sizes = np.fromiter((len(v) for v in by_gram.values()), dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    postings = np.fromiter(
+        (i for v in by_gram.values() for i in v), dtype=np.int32, count=offsets[-1]
+    )
+    return TagSet(ordered, gram_rows, offsets, postings, _build_phrases(ordered))
+
+
 @dataclass(frozen=True)
 class TagIndex:
     art_tags: frozenset[str]
     oracle_tags: frozenset[str]
     version: int  # simple counter for reload invalidation
+    digest: str = ""  # content hash of the tag data file
+    # Pruning structures (None without numpy/rapidfuzz)
+    art_set: TagSet | None = None
+    oracle_set: TagSet | None = None
 
 
-@lru_cache(maxsize=1)
-def load_index() -> TagIndex:
-    try:
-        text = DATA_FILE.read_text(encoding="utf-8")
-        raw = json.loads(text)
-    except FileNotFoundError:  # pragma: no cover
-        logger.error("Tag data file missing: %s", DATA_FILE)
-        return TagIndex(frozenset(), frozenset(), 0)
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+def _classify_tags(raw: list) -> tuple[set[str], set[str]]:
     art: set[str] = set()
     oracle: set[str] = set()
     for block in raw:
@@ -88,8 +246,87 @@ def load_index() -> TagIndex:
             else:
                 # default to art if ambiguous (rare)
                 art.add(key_l)
+    return art, oracle
+
+
+def parse_tag_file(path: Path = DATA_FILE) -> tuple[set[str], set[str], str]:
+    """(art tags, oracle tags, content digest) from the tag JSON."""
+    text = path.read_text(encoding="utf-8")
+    art, oracle = _classify_tags(json.loads(text))
+    return art, oracle, _digest(text)
+
+
+def tag_file_digest(path: Path = DATA_FILE) -> str:
+    return _digest(path.read_text(encoding="utf-8"))
+
+
+def _load(version: int) -> TagIndex:
+    try:
+        text = DATA_FILE.read_text(encoding="utf-8")
+    except FileNotFoundError:  # pragma: no cover
+        logger.error("Tag data file missing: %s", DATA_FILE)
+        return TagIndex(frozenset(), frozenset(), 0)
+    digest = _digest(text)
+    if fuzz is not None:
+        from .tag_snapshot import SNAPSHOT_FILE, read_snapshot, snapshot_digest
+
+        if snapshot_digest() == digest:
+            idx = read_snapshot(SNAPSHOT_FILE, version)
+            logger.info(
+                "Mapped tag snapshot %s: %d art tags and %d oracle tags",
+                SNAPSHOT_FILE.name,
+                len(idx.art_tags),
+                len(idx.oracle_tags),
+            )
+            return idx
+        logger.warning(
+            "Tag snapshot missing or stale; building index in-process "
+            "(run python -m app.services.tag_snapshot)"
+        )
+    art, oracle = _classify_tags(json.loads(text))
     logger.info("Loaded %d art tags and %d oracle tags", len(art), len(oracle))
-    return TagIndex(frozenset(art), frozenset(oracle), 1)
+    if fuzz is None:
+        return TagIndex(frozenset(art), frozenset(oracle), version, digest)
+    return TagIndex(
+        frozenset(art),
+        frozenset(oracle),
+        version,
+        digest,
+        _build_tagset(art),
+        _build_tagset(oracle),
+    )
+
+
+_index: TagIndex | None = None
+_index_lock = threading.Lock()
+
+
+def load_index() -> TagIndex:
+    """The current tag index (loaded on first use, swapped by ``reload_index``)."""
+    idx = _index
+    if idx is None:
+        with _index_lock:
+            idx = _index or _set_index(_load(1))
+    return idx
+
+
+def _set_index(idx: TagIndex) -> TagIndex:
+    global _index
+    _index = idx
+    return idx
+
+
+def reload_index() -> TagIndex:
+    """Atomically swap in a freshly loaded index with ``version`` bumped.
+
+    Tag candidate and response cache keys embed the index digest, so
+    entries built against the old tag set stop matching.
+    """
+    with _index_lock:
+        old = _index
+        idx = _set_index(_load((old.version if old else 0) + 1))
+    logger.info("Tag index reloaded: version %d digest %s", idx.version, idx.digest)
+    return idx
 
 
 def _candidate_terms(text: str) -> List[str]:
@@ -103,7 +340,151 @@ def _candidate_terms(text: str) -> List[str]:
     return list(dict.fromkeys(tokens + bigrams))  # preserve order unique
 
 
-@lru_cache(maxsize=256)
+def _top_k_loop(
+    terms: List[str], tags: Iterable[str], k: int, threshold: int
+) -> List[str]:
+    # Fallback without rapidfuzz/numpy: score each tag as max across terms
+    scored: list[tuple[int, str]] = []
+    for tg in tags:
+        best = 0
+        for term in terms:
+            s = _score(term, tg)
+            if s > best:
+                best = s
+                if best == 100:
+                    break
+        if best >= threshold:
+            scored.append((best, tg))
+    scored.sort(key=lambda x: (-x[0], x[1]))
+    return [t for _, t in scored[:k]]
+
+
+def _top_k(
+    best: "np.ndarray", tags: Sequence[str], k: int, threshold: int
+) -> List[str]:
+    """Highest-scoring ``k`` tags at or above ``threshold`` (ties by name)."""
+    if k <= 0:
+        return []
+    cand = np.flatnonzero(best >= threshold)
+    if len(cand) > k:
+        # Keep everything tied with the k-th best so name order stays exact
+        kth = np.partition(best[cand], len(cand) - k)[len(cand) - k]
+        cand = cand[best[cand] >= kth]
+    order = np.lexsort((cand, -best[cand]))[:k]
+    return [tags[i] for i in cand[order]]
+
+
+def _best_scores(
+    terms_per_text: List[List[str]], ts: TagSet, threshold: int, workers: int
+) -> "np.ndarray":
+    """Texts x tags matrix: best WRatio over each text's terms (one cdist call)."""
+    flat = [t for terms in terms_per_text for t in terms]
+    scores = process.cdist(
+        flat, ts.tags, scorer=fuzz.WRatio, score_cutoff=threshold, workers=workers
+    )
+    starts = np.cumsum([0] + [len(terms) for terms in terms_per_text[:-1]])
+    return np.maximum.reduceat(scores, starts, axis=0)
+
+
+def _best_scores_pruned(
+    terms_per_text: List[List[str]], ts: TagSet, threshold: int, workers: int
+) -> "np.ndarray":
+    """Same matrix as ``_best_scores``, scoring only tags that can reach ``threshold``.
+
+    Skipped pairs would score below ``threshold`` and be cut to 0 by
+    ``score_cutoff`` in ``_best_scores`` anyway (see ``TagSet.candidates``).
+    """
+    best = np.zeros((len(terms_per_text), len(ts.tags)), dtype=np.float32)
+    scored: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+    for row, terms in enumerate(terms_per_text):
+        pairs = 0
+        for term in terms:
+            if term not in scored:
+                ids = ts.candidates(term, threshold)
+                scores = process.cdist(
+                    [term],
+                    [ts.tags[i] for i in ids],
+                    scorer=fuzz.WRatio,
+                    score_cutoff=threshold,
+                    workers=workers,
+                )[0]
+                scored[term] = (ids, scores)
+            ids, scores = scored[term]
+            best[row, ids] = np.maximum(best[row, ids], scores)
+            pairs += len(ids)
+        TAG_PAIRS_SCORED.observe(pairs)
+    return best
+
+
+def _score_matrix(
+    texts: List[str],
+    terms_per_text: List[List[str]],
+    ts: TagSet,
+    threshold: int,
+    workers: int,
+    prune: bool,
+) -> "np.ndarray":
+    if prune:
+        best = _best_scores_pruned(terms_per_text, ts, threshold, workers)
+    else:
+        best = _best_scores(terms_per_text, ts, threshold, workers)
+    # Multi-word tags written out in full are exact matches even when the
+    # stopword-filtered term bigrams never line up with them
+    for row, text in enumerate(texts):
+        hits = ts.phrase_hits(text)
+        if hits:
+            best[row, hits] = 100
+    return best
+
+
+def suggest_tags_batch(
+    texts: Sequence[str],
+    max_art: int = 15,
+    max_oracle: int = 15,
+    art_threshold: int = 70,
+    oracle_threshold: int = 70,
+    workers: int = 1,
+    prune: bool = True,
+) -> list[tuple[list[str], list[str]]]:
+    """``suggest_tags`` for many texts in one pass.
+
+    ``workers`` is passed to rapidfuzz (-1 = all cores; the GIL is released).
+    ``prune=False`` scores every term against every tag (reference path).
+    """
+    idx = load_index()
+    terms_per_text = [_candidate_terms(t) for t in texts]
+    results: list[tuple[list[str], list[str]]] = [([], []) for _ in texts]
+    live = [i for i, terms in enumerate(terms_per_text) if terms]
+    if not live:
+        return results
+    if idx.art_set is None or idx.oracle_set is None:
+        for i in live:
+            results[i] = (
+                _top_k_loop(terms_per_text[i], idx.art_tags, max_art, art_threshold),
+                _top_k_loop(
+                    terms_per_text[i], idx.oracle_tags, max_oracle, oracle_threshold
+                ),
+            )
+        return results
+    live_texts = [texts[i] for i in live]
+    live_terms = [terms_per_text[i] for i in live]
+    picked = []
+    for ts, k, threshold in (
+        (idx.art_set, max_art, art_threshold),
+        (idx.oracle_set, max_oracle, oracle_threshold),
+    ):
+        if not ts.tags:
+            picked.append([[] for _ in live])
+            continue
+        best = _score_matrix(live_texts, live_terms, ts, threshold, workers, prune)
+        picked.append(
+            [_top_k(best[row], ts.tags, k, threshold) for row in range(len(live))]
+        )
+    for row, i in enumerate(live):
+        results[i] = (picked[0][row], picked[1][row])
+    return results
+
+
 def suggest_tags(
     user_text: str,
     max_art: int = 15,
@@ -111,30 +492,18 @@ def suggest_tags(
     art_threshold: int = 70,
     oracle_threshold: int = 70,
 ) -> tuple[list[str], list[str]]:
-    idx = load_index()
-    terms = _candidate_terms(user_text)
-    if not terms:
-        return [], []
-
-    # Score each tag as max score across terms; early prune via first term score
-    def top_k(tags: Iterable[str], k: int, threshold: int) -> List[str]:
-        scored: list[tuple[int, str]] = []
-        for tg in tags:
-            best = 0
-            for term in terms:
-                s = _score(term, tg)
-                if s > best:
-                    best = s
-                    if best == 100:
-                        break
-            if best >= threshold:
-                scored.append((best, tg))
-        scored.sort(key=lambda x: (-x[0], x[1]))
-        return [t for _, t in scored[:k]]
-
-    art_candidates = top_k(idx.art_tags, max_art, art_threshold)
-    oracle_candidates = top_k(idx.oracle_tags, max_oracle, oracle_threshold)
-    return art_candidates, oracle_candidates
-
-
-__all__ = ["load_index", "suggest_tags", "TagIndex"]
+    return suggest_tags_batch(
+        [user_text], max_art, max_oracle, art_threshold, oracle_threshold
+    )[0]
+
+
+__all__ = [
+    "load_index",
+    "reload_index",
+    "parse_tag_file",
+    "tag_file_digest",
+    "suggest_tags",
+    "suggest_tags_batch",
+    "TagIndex",
+    "TagSet",
+]
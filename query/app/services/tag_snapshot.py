@@ -0,0 +1,163 @@
+"""Compact binary snapshot of the tag index, memory-mapped by every worker.
+
+Layout (little endian)::
+
+    b"GRTAGS02" | u32 header length | JSON header | pad to 8 | sections...
+
+The header records the sha1 digest of the source JSON and, per tag set
+("art", "oracle"), ``[offset, size]`` of four sections: ``tags`` and
+``grams`` (the indexed characters; newline-joined UTF-8), ``offsets``
+(int64) and ``postings`` (int32). Arrays are read with ``np.frombuffer`` straight over the mapping,
+so the postings live once in the page cache however many workers load them.
+
+Build (run from query/, also done in the Docker image)::
+
+    python -m app.services.tag_snapshot
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from . import tag_index
+from .tag_index import TagIndex, TagSet, _build_phrases, _build_tagset
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GRTAGS02"
+SNAPSHOT_FILE = tag_index.DATA_FILE.with_suffix(".snap")
+
+_SETS = ("art", "oracle")
+
+
+def _pad8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def write_snapshot(index: TagIndex, path: Path = SNAPSHOT_FILE) -> Path:
+    """Serialize ``index`` (which must carry tag sets) and atomically replace ``path``."""
+    blobs: list[bytes] = []
+    sections: dict[str, dict[str, list[int]]] = {}
+    cursor = 0
+    for name, ts in (("art", index.art_set), ("oracle", index.oracle_set)):
+        assert ts is not None, "snapshot needs numpy/rapidfuzz tag sets"
+        sections[name] = {}
+        for section, data in (
+            ("tags", "\n".join(ts.tags).encode()),
+            ("grams", "\n".join(ts.gram_rows).encode()),
+            ("offsets", np.ascontiguousarray(ts.offsets, dtype="<i8").tobytes()),
+            ("postings", np.ascontiguousarray(ts.postings, dtype="<i4").tobytes()),
+        ):
+            sections[name][section] = [cursor, len(data)]
+            blobs.append(data + b"\0" * (_pad8(len(data)) - len(data)))
+            cursor += _pad8(len(data))
+    header = json.dumps({"digest": index.digest, "sections": sections}).encode()
+    prefix = MAGIC + struct.pack("<I", len(header)) + header
+    prefix += b"\0" * (_pad8(len(prefix)) - len(prefix))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(prefix)
+            for blob in blobs:
+                f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        # Readers holding the old mapping keep the old inode alive
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return path
+
+
+def snapshot_digest(path: Path = SNAPSHOT_FILE) -> str | None:
+    """Source digest recorded in the snapshot, or None if missing/unreadable."""
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (n,) = struct.unpack("<I", f.read(4))
+            return json.loads(f.read(n))["digest"]
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+
+def read_snapshot(path: Path = SNAPSHOT_FILE, version: int = 1) -> TagIndex:
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a tag index snapshot")
+    (n,) = struct.unpack_from("<I", mm, len(MAGIC))
+    start = len(MAGIC) + 4
+    header = json.loads(mm[start : start + n])
+    base = _pad8(start + n)
+
+    def text(off: int, size: int) -> list[str]:
+        raw = mm[base + off : base + off + size].decode()
+        return raw.split("\n") if raw else []
+
+    def array(off: int, size: int, dtype: str) -> np.ndarray:
+        count = size // np.dtype(dtype).itemsize
+        return np.frombuffer(mm, dtype=dtype, count=count, offset=base + off)
+
+    sets: dict[str, TagSet] = {}
+    for name in _SETS:
+        sec = header["sections"][name]
+        tags = tuple(text(*sec["tags"]))
+        sets[name] = TagSet(
+            tags,
+            {g: r for r, g in enumerate(text(*sec["grams"]))},
+            array(*sec["offsets"], "<i8"),
+            array(*sec["postings"], "<i4"),
+            _build_phrases(tags),
+        )
+    return TagIndex(
+        frozenset(sets["art"].tags),
+        frozenset(sets["oracle"].tags),
+        version,
+        header["digest"],
+        sets["art"],
+        sets["oracle"],
+    )
+
+
+def build_snapshot(path: Path = SNAPSHOT_FILE) -> TagIndex:
+    """Compile the tag JSON into ``path``; returns the compiled index."""
+    art, oracle, digest = tag_index.parse_tag_file()
+    index = TagIndex(
+        frozenset(art),
+        frozenset(oracle),
+        1,
+        digest,
+        _build_tagset(art),
+        _build_tagset(oracle),
+    )
+    write_snapshot(index, path)
+    logger.info("Wrote tag snapshot %s (digest %s)", path, digest)
+    return index
+
+
+def ensure_snapshot(path: Path = SNAPSHOT_FILE) -> bool:
+    """Rebuild ``path`` if missing or older than the tag JSON; True if rebuilt."""
+    if snapshot_digest(path) == tag_index.tag_file_digest():
+        return False
+    build_snapshot(path)
+    return True
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    out = Path(sys.argv[1]) if len(sys.argv) > 1 else SNAPSHOT_FILE
+    build_snapshot(out)
@@ -0,0 +1,168 @@
+"""Per-attempt and per-request LLM token, cost and latency accounting.
+
+Every LLM attempt reports its ``usage`` block (input, cached and output
+tokens), an estimated USD cost and its wall time. Totals are exported as
+Prometheus series labelled by model and accumulated into the current
+request's ``LLMUsage`` (a context variable set by the router), which is
+written to the request log.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from prometheus_client import Counter, Histogram
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "LLM tokens by kind (input includes cached)",
+    ["model", "kind"],  # kind: input, cached, output
+    namespace="grimoire",
+    subsystem="query",
+)
+LLM_PROMPT_TOKENS = Histogram(
+    "llm_prompt_tokens",
+    "Prompt (input) tokens per LLM parse attempt",
+    ["model"],
+    buckets=(250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000),
+    namespace="grimoire",
+    subsystem="query",
+)
+LLM_OUTPUT_TOKENS = Histogram(
+    "llm_output_tokens",
+    "Output tokens per LLM parse attempt",
+    ["model"],
+    buckets=(50, 100, 200, 400, 800, 1600, 3200),
+    namespace="grimoire",
+    subsystem="query",
+)
+LLM_PROMPT_CACHE_RATIO = Histogram(
+    "llm_prompt_cache_hit_ratio",
+    "Fraction of prompt tokens served from the provider's prefix cache",
+    ["model"],
+    buckets=(0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0),
+    namespace="grimoire",
+    subsystem="query",
+)
+LLM_COST = Counter(
+    "llm_cost_usd_total",
+    "Estimated LLM spend in USD",
+    ["model"],
+    namespace="grimoire",
+    subsystem="query",
+)
+LLM_ATTEMPT_LATENCY = Histogram(
+    "llm_attempt_latency_seconds",
+    "Wall time per LLM attempt",
+    ["model"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10),
+    namespace="grimoire",
+    subsystem="query",
+)
+
+# USD per 1M tokens: (input, cached input, output). Override/extend with
+# LLM_PRICING_JSON='{"model": [input, cached, output]}'.
+DEFAULT_PRICING: dict[str, tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-5-mini": (0.25, 0.025, 2.00),
+    "gpt-5-nano": (0.05, 0.005, 0.40),
+}
+
+
+def _load_pricing() -> dict[str, tuple[float, float, float]]:
+    pricing = dict(DEFAULT_PRICING)
+    if settings.llm_pricing_json:
+        try:
+            extra = json.loads(settings.llm_pricing_json)
+            pricing.update({k: tuple(v) for k, v in extra.items()})  # type: ignore
+        except (ValueError, TypeError) as e:
+            logger.warning("Ignoring invalid LLM_PRICING_JSON: %s", e)
+    return pricing
+
+
+PRICING = _load_pricing()
+
+
+def estimate_cost(model: str, input_tokens: int, cached: int, output: int) -> float:
+    # Dated snapshots ("gpt-4o-mini-2024-07-18") price like their base model
+    price = PRICING.get(model) or next(
+        (p for m, p in PRICING.items() if model.startswith(m + "-")), None
+    )
+    if price is None:
+        return 0.0
+    p_in, p_cached, p_out = price
+    return ((input_tokens - cached) * p_in + cached * p_cached + output * p_out) / 1e6
+
+
+@dataclass
+class LLMUsage:
+    attempts: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+    llm_secs: float = 0.0
+
+    def log_fields(self) -> str:
+        return (
+            f"llm_attempts={self.attempts} input_tokens={self.input_tokens} "
+            f"cached_tokens={self.cached_tokens} output_tokens={self.output_tokens} "
+            f"cost_usd={self.cost_usd:.6f} llm_secs={self.llm_secs:.3f}"
+        )
+
+
+request_usage: ContextVar[LLMUsage | None] = ContextVar("request_usage", default=None)
+
+
+def start_request() -> LLMUsage:
+    """Begin accounting for the current request (tasks it spawns share it)."""
+    usage = LLMUsage()
+    request_usage.set(usage)
+    return usage
+
+
+def record_attempt(model: str, resp, secs: float):
+    """Record one attempt; ``resp`` may be None (failed before a response)."""
+    LLM_ATTEMPT_LATENCY.labels(model).observe(secs)
+    acc = request_usage.get()
+    if acc is not None:
+        acc.attempts += 1
+        acc.llm_secs += secs
+    usage = getattr(resp, "usage", None)
+    if usage is None:
+        return
+    details = getattr(usage, "input_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+    cost = estimate_cost(model, usage.input_tokens, cached, usage.output_tokens)
+    LLM_TOKENS.labels(model, "input").inc(usage.input_tokens)
+    LLM_TOKENS.labels(model, "cached").inc(cached)
+    LLM_TOKENS.labels(model, "output").inc(usage.output_tokens)
+    LLM_PROMPT_TOKENS.labels(model).observe(usage.input_tokens)
+    LLM_OUTPUT_TOKENS.labels(model).observe(usage.output_tokens)
+    if usage.input_tokens:
+        LLM_PROMPT_CACHE_RATIO.labels(model).observe(cached / usage.input_tokens)
+    LLM_COST.labels(model).inc(cost)
+    if acc is not None:
+        acc.input_tokens += usage.input_tokens
+        acc.cached_tokens += cached
+        acc.output_tokens += usage.output_tokens
+        acc.cost_usd += cost
+
+
+__all__ = [
+    "LLMUsage",
+    "estimate_cost",
+    "record_attempt",
+    "request_usage",
+    "start_request",
+]
@@ -0,0 +1,120 @@
+"""Startup warmup: prime lazy state before the worker reports ready.
+
+Each stage is timed and exported as ``startup_stage_seconds{stage}``; the
+readiness endpoint reports not-ready until every stage has finished. The
+final stage runs the fixtures below through the deterministic pipeline
+(canonicalize, decompile / fast path, compile) and checks the compiled
+query, so a broken build never turns ready. Nothing here calls the LLM or
+writes to Redis.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from prometheus_client import Gauge
+
+from .compiler import compile_to_scryfall, decompile_scryfall
+from .example_index import load_example_index
+from .fastpath import fast_parse
+from .llm import _build_prompt, get_client
+from .normalize import canonicalize
+from .tag_cache import tag_candidates
+from .tag_index import load_index
+
+logger = logging.getLogger(__name__)
+
+STARTUP_STAGE_SECONDS = Gauge(
+    "startup_stage_seconds",
+    "Wall time of each startup warmup stage",
+    ["stage"],
+    namespace="grimoire",
+    subsystem="query",
+)
+STARTUP_READY = Gauge(
+    "startup_ready",
+    "1 once startup warmup has completed on this worker",
+    namespace="grimoire",
+    subsystem="query",
+)
+
+# (request text, expected compiled query)
+FIXTURES = [
+    (
+        "Mono-white angels, CMC <= 5, legal in Commander",
+        "t:creature t:angel mv<=5 id<=w legal:commander sort:edhrec",
+    ),
+    (
+        "t:creature id<=w mv<=5 legal:commander",
+        "t:creature mv<=5 id<=w legal:commander sort:edhrec",
+    ),
+]
+
+
+class WarmupError(RuntimeError):
+    """A warmup self-check produced an unexpected result."""
+
+
+@dataclass
+class WarmupState:
+    ready: bool = False
+    error: str | None = None
+    stages: dict[str, float] = field(default_factory=dict)
+
+
+state = WarmupState()
+
+
+async def stage(name: str, fn: Callable[[], Any], in_thread: bool = False) -> Any:
+    """Run and time one stage (``in_thread`` for CPU-bound sync work)."""
+    t0 = time.perf_counter()
+    result = await asyncio.to_thread(fn) if in_thread else fn()
+    if inspect.isawaitable(result):
+        result = await result
+    secs = time.perf_counter() - t0
+    STARTUP_STAGE_SECONDS.labels(name).set(secs)
+    state.stages[name] = round(secs, 4)
+    return result
+
+
+def synthetic_parse():
+    for raw, expected in FIXTURES:
+        text = canonicalize(raw)
+        ir = decompile_scryfall(raw) or fast_parse(text)
+        if ir is None:
+            raise WarmupError(f"fixture not resolved without the LLM: {raw!r}")
+        query, _, _ = compile_to_scryfall(ir)
+        if query != expected:
+            raise WarmupError(f"fixture {raw!r} compiled to {query!r}")
+
+
+async def run():
+    """Prime every lazily initialized component, then mark the worker ready."""
+    t0 = time.perf_counter()
+    sample = canonicalize(FIXTURES[0][0])
+    try:
+        await stage("tag_index", load_index, in_thread=True)
+        await stage("example_index", load_example_index, in_thread=True)
+        await stage("tag_scoring", lambda: tag_candidates(sample), in_thread=True)
+        await stage("prompt", lambda: _build_prompt(sample), in_thread=True)
+        await stage("llm_client", get_client, in_thread=True)
+        await stage("synthetic_parse", synthetic_parse, in_thread=True)
+    except Exception as e:  # noqa
+        state.error = f"{type(e).__name__}: {e}"
+        logger.exception("Startup warmup failed; worker stays not-ready")
+        return
+    state.ready = True
+    STARTUP_READY.set(1)
+    logger.info(
+        "Warmup finished in %.2fs: %s",
+        time.perf_counter() - t0,
+        " ".join(f"{k}={v:.3f}s" for k, v in state.stages.items()),
+    )
+
+
+__all__ = ["run", "stage", "state", "WarmupState", "WarmupError", "FIXTURES"]
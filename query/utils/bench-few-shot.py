@@ -0,0 +1,139 @@
+"""Compare static and similarity-selected few-shot prompts.
+
+Run from the query/ directory against the real API (accuracy numbers are only
+meaningful there) or the local mock (prompt size and latency only):
+
+    python utils/bench-few-shot.py utils/few-shot-eval.jsonl --k 0 2 4 6
+
+A ``static`` row (every FEW_SHOT example, no selection) is always run first
+as the baseline; ``--k 0`` is CORE_FEW_SHOT alone. The eval file is JSONL
+with ``{"text": ..., "ir": {...}}`` per line (IRs may list only non-default
+fields). For each row the script reports mean prompt characters and input
+tokens, LLM latency percentiles, exact-IR match rate and field accuracy
+(share of non-default top-level IR fields that match). ``--dry-run`` skips
+the LLM and reports prompt sizes with a token (chars / 4) and input cost
+estimate for ``OPENAI_MODEL`` instead; the prompts are below the provider's
+1024-token prompt-caching minimum, so the estimate prices them all uncached.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+from app.core.config import settings  # noqa: E402
+from app.models import QueryIR  # noqa: E402
+from app.services import llm, usage  # noqa: E402
+from app.services.few_shot_examples import FEW_SHOT  # noqa: E402
+from app.services.normalize import canonicalize  # noqa: E402
+
+STATIC_PREFIX = llm._PROMPT_INTRO + "\n\n" + llm._render_examples(FEW_SHOT)
+
+
+def load_eval(path: Path) -> list[tuple[str, dict]]:
+    rows = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            row = json.loads(line)
+            ir = QueryIR.model_validate(row["ir"])
+            rows.append(
+                (canonicalize(row["text"]), ir.model_dump(exclude_defaults=True))
+            )
+    return rows
+
+
+def field_scores(got: dict, want: dict) -> tuple[int, int]:
+    fields = set(got) | set(want)
+    return sum(got.get(f) == want.get(f) for f in fields), len(fields)
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def build_prompt(text: str, k: int | None) -> str:
+    if k is None:
+        # Baseline: the whole FEW_SHOT list in place of core + selected
+        return llm._build_prompt(text, 0).replace(llm.PROMPT_PREFIX, STATIC_PREFIX, 1)
+    return llm._build_prompt(text, k)
+
+
+async def bench(rows: list[tuple[str, dict]], k: int | None, dry_run: bool) -> dict:
+    chars, tokens, latencies = [], [], []
+    exact = matched = total = 0
+    for text, want in rows:
+        prompt = await asyncio.to_thread(build_prompt, text, k)
+        chars.append(len(prompt))
+        if dry_run:
+            continue
+        acc = usage.start_request()
+        t0 = time.perf_counter()
+        ir = await llm.llm_parse(prompt, settings.openai_timeout_secs)
+        latencies.append(time.perf_counter() - t0)
+        tokens.append(acc.input_tokens)
+        got = ir.model_dump(exclude_defaults=True) if ir is not None else {}
+        exact += got == want
+        m, n = field_scores(got, want)
+        matched += m
+        total += n
+    out = {"k": k, "prompt_chars": sum(chars) / len(chars)}
+    if dry_run:
+        est = out["prompt_chars"] / 4
+        out.update(
+            est_tokens=est,
+            est_cost_1k=usage.estimate_cost(settings.openai_model, est, 0, 0) * 1000,
+        )
+    else:
+        out.update(
+            input_tokens=sum(tokens) / len(tokens),
+            p50_ms=percentile(latencies, 0.5) * 1000,
+            p95_ms=percentile(latencies, 0.95) * 1000,
+            exact=exact / len(rows),
+            field_acc=matched / total if total else float("nan"),
+        )
+    return out
+
+
+async def run(args) -> int:
+    rows = load_eval(Path(args.eval))
+    try:
+        for k in [None, *args.k]:
+            r = await bench(rows, k, args.dry_run)
+            label = "static" if k is None else f"k={k}"
+            line = f"{label:<8} prompt_chars={r['prompt_chars']:.0f}"
+            if args.dry_run:
+                line += (
+                    f" est_input_tokens={r['est_tokens']:.0f}"
+                    f" est_input_usd_per_1k={r['est_cost_1k']:.4f}"
+                )
+            else:
+                line += (
+                    f" input_tokens={r['input_tokens']:.0f}"
+                    f" p50={r['p50_ms']:.0f}ms p95={r['p95_ms']:.0f}ms"
+                    f" exact={r['exact']:.0%} field_acc={r['field_acc']:.0%}"
+                )
+            print(line)
+    finally:
+        await llm.close_client()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("eval", help="JSONL of {'text': ..., 'ir': {...}}")
+    parser.add_argument("--k", type=int, nargs="+", default=[0, 4])
+    parser.add_argument("--dry-run", action="store_true")
+    return asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
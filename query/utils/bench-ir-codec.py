@@ -0,0 +1,89 @@
+"""Compare the cached IR codec against the previous JSON encoding.
+
+Run from the query/ directory:
+
+    python utils/bench-ir-codec.py utils/few-shot-eval.jsonl
+
+The corpus is every few-shot example IR plus the IRs in the given JSONL
+files (``{"text": ..., "ir": {...}}`` per line). For each encoding the
+script reports mean / max encoded bytes and mean encode and decode time
+per IR. Every encoding must round-trip to an equal ``QueryIR``, otherwise
+the script exits non-zero.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+from app.models import QueryIR  # noqa: E402
+from app.services.few_shot_examples import EXAMPLE_POOL, FEW_SHOT  # noqa: E402
+from app.services.ir_codec import decode_ir, encode_ir  # noqa: E402
+
+
+def load_irs(paths: list[Path]) -> list[QueryIR]:
+    raw = [ex["ir"] for ex in FEW_SHOT + EXAMPLE_POOL]
+    for path in paths:
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                raw.append(json.loads(line)["ir"])
+    return [QueryIR.model_validate(d) for d in raw]
+
+
+ENCODINGS = {
+    "json (before)": (
+        lambda ir: ir.model_dump_json().encode(),
+        lambda b: QueryIR.model_validate_json(b),
+    ),
+    "msgpack": (lambda ir: encode_ir(ir, compress_min=0), decode_ir),
+    "msgpack+zlib": (lambda ir: encode_ir(ir, compress_min=1), decode_ir),
+    "default": (encode_ir, decode_ir),
+}
+
+
+def per_item_us(fn, items, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(items) * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="JSONL files of {'ir': ...}")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    irs = load_irs([Path(p) for p in args.files])
+    print(f"{len(irs)} IRs")
+    print(f"{'encoding':<15} {'mean B':>7} {'max B':>6} {'enc us':>7} {'dec us':>7}")
+    failures = 0
+    baseline = None
+    for name, (enc, dec) in ENCODINGS.items():
+        blobs = [enc(ir) for ir in irs]
+        for ir, blob in zip(irs, blobs):
+            if dec(blob) != ir:
+                failures += 1
+                print(f"ROUND-TRIP FAILED ({name}): {ir.model_dump_json()}")
+        sizes = [len(b) for b in blobs]
+        mean = sum(sizes) / len(sizes)
+        baseline = baseline or mean
+        print(
+            f"{name:<15} {mean:7.1f} {max(sizes):6d} "
+            f"{per_item_us(enc, irs, args.repeat):7.1f} "
+            f"{per_item_us(dec, blobs, args.repeat):7.1f}"
+            f"   ({mean / baseline:.0%} of JSON)"
+        )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
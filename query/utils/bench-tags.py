@@ -0,0 +1,134 @@
+"""Benchmark tag suggestion: Python loop, brute-force cdist, pruned cdist.
+
+Run from the query/ directory (uses the real tag file in data/):
+
+    python utils/bench-tags.py utils/sample-traffic.jsonl utils/few-shot-eval.jsonl \
+        utils/tag-typos.jsonl
+
+Times, per input text, the original implementation (``fuzz.WRatio`` in a
+Python double loop over tags x terms), the brute-force vectorized path
+(``suggest_tags_batch(prune=False)``, every term against every tag) and the
+default pruned path, then the whole corpus in one batch call. The given
+files double as the golden set (``tag-typos.jsonl`` holds one-typo variants
+of the traffic, the inputs where a term shares few characters with the tags
+it should match): pruned results must be identical to brute force for every
+text, otherwise the script exits non-zero.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rapidfuzz import fuzz  # noqa: E402
+
+from app.services.tag_index import (  # noqa: E402
+    _candidate_terms,
+    load_index,
+    suggest_tags_batch,
+)
+
+
+def legacy_suggest(text: str, k: int, threshold: int) -> tuple[list[str], list[str]]:
+    terms = _candidate_terms(text)
+    if not terms:
+        return [], []
+
+    def top_k(tags):
+        scored = []
+        for tg in tags:
+            best = 0
+            for term in terms:
+                s = fuzz.WRatio(term, tg)
+                if s > best:
+                    best = s
+                    if best == 100:
+                        break
+            if best >= threshold:
+                scored.append((best, tg))
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        return [t for _, t in scored[:k]]
+
+    idx = load_index()
+    return top_k(idx.art_tags), top_k(idx.oracle_tags)
+
+
+def load_texts(paths: list[Path]) -> list[str]:
+    texts = []
+    for path in paths:
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                texts.append(json.loads(line)["text"])
+    return list(dict.fromkeys(texts))
+
+
+def timed(fn, repeat: int) -> tuple[float, object]:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("traffic", nargs="+", help="JSONL files of {'text': ...}")
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--threshold", type=int, default=70)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=-1, help="for the batch call")
+    args = parser.parse_args()
+
+    idx = load_index()
+    texts = load_texts([Path(p) for p in args.traffic])
+    print(
+        f"{len(idx.art_tags)} art + {len(idx.oracle_tags)} oracle tags, "
+        f"{len(texts)} texts"
+    )
+    kw = dict(
+        max_art=args.k,
+        max_oracle=args.k,
+        art_threshold=args.threshold,
+        oracle_threshold=args.threshold,
+    )
+
+    loop_secs, brute_secs, pruned_secs, mismatches = [], [], [], 0
+    for text in texts:
+        t_loop, _ = timed(
+            lambda: legacy_suggest(text, args.k, args.threshold), args.repeat
+        )
+        t_brute, want = timed(
+            lambda: suggest_tags_batch([text], prune=False, **kw)[0], args.repeat
+        )
+        t_pruned, got = timed(lambda: suggest_tags_batch([text], **kw)[0], args.repeat)
+        loop_secs.append(t_loop)
+        brute_secs.append(t_brute)
+        pruned_secs.append(t_pruned)
+        if got != want:
+            mismatches += 1
+            print(f"MISMATCH {text!r}\n  brute:  {want}\n  pruned: {got}")
+
+    t_batch, _ = timed(
+        lambda: suggest_tags_batch(texts, workers=args.workers, **kw), args.repeat
+    )
+    n = len(texts)
+    mean_loop = sum(loop_secs) / n * 1000
+    mean_brute = sum(brute_secs) / n * 1000
+    mean_pruned = sum(pruned_secs) / n * 1000
+    print(f"loop:        {mean_loop:8.2f} ms/call")
+    print(f"brute cdist: {mean_brute:8.2f} ms/call ({mean_loop / mean_brute:.1f}x)")
+    print(f"pruned:      {mean_pruned:8.2f} ms/call ({mean_loop / mean_pruned:.1f}x)")
+    print(
+        f"batch:       {t_batch / n * 1000:8.2f} ms/text "
+        f"({n} texts in {t_batch * 1000:.0f} ms, workers={args.workers})"
+    )
+    print(f"parity:      {n - mismatches}/{n} pruned == brute force")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
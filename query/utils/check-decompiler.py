@@ -0,0 +1,108 @@
+"""Round-trip property check: decompile_scryfall(compile_to_scryfall(ir)) == ir.
+
+Run from the query/ directory: ``OPENAI_API_KEY=x python utils/check-decompiler.py [N] [SEED]``.
+Generates N random IRs from the vocabulary the compiler can emit losslessly
+and exits non-zero on the first IR that does not survive the round trip.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models import QueryIR  # noqa: E402
+from app.services.compiler import (  # noqa: E402
+    CARD_TYPE_WORDS,
+    SUPERTYPE_WORDS,
+    VALID_RARITIES,
+    compile_to_scryfall,
+    decompile_scryfall,
+)
+from app.services.tag_index import load_index  # noqa: E402
+
+WORDS = ["draw", "a card", "sol ring", 'the "big" one', "flying", "destroy target"]
+SUBTYPES = ["angel", "goblin", "elf", "dragon", "equipment", "aura"]
+OPS = ["<", "<=", "=", ">=", ">"]
+NUMERIC = ["mana_value", "power", "toughness", "loyalty", "card_number"]
+NUMERIC += ["price_usd", "price_eur", "price_tix"]
+CATEGORICAL = {
+    "layout": ["normal", "split", "transform"],
+    "languages": ["en", "ja"],
+    "artist": ["rebecca guay", "john avon"],
+    "watermark": ["orzhov", "set"],
+    "border": ["black", "borderless"],
+    "frame": ["2015", "future"],
+    "reprint_groups": ["reserved"],
+}
+
+
+def _some(rng: random.Random, pool, k: int = 2) -> list:
+    return rng.sample(list(pool), rng.randint(0, min(k, len(pool))))
+
+
+def random_ir(rng: random.Random) -> QueryIR:
+    idx = load_index()
+    data: dict = {
+        "entity": {
+            "card_types": _some(rng, sorted(CARD_TYPE_WORDS)),
+            "subtypes": _some(rng, SUBTYPES),
+            "supertypes": _some(rng, sorted(SUPERTYPE_WORDS), 1),
+            "name_contains": _some(rng, WORDS, 1),
+            "oracle_text_contains": _some(rng, WORDS, 1),
+        },
+        "name_exact": _some(rng, WORDS, 1),
+        "name_not": _some(rng, WORDS, 1),
+        "oracle_text_exact": _some(rng, WORDS, 1),
+        "oracle_text_not": _some(rng, WORDS, 1),
+        "flavor_text_contains": _some(rng, WORDS, 1),
+        "flavor_text_exact": _some(rng, WORDS, 1),
+        "flavor_text_not": _some(rng, WORDS, 1),
+        "set_codes": _some(rng, ["m21", "neo", "2x2"], 1),
+        "rarities": _some(rng, sorted(VALID_RARITIES), 3),
+        "art_tags": sorted(_some(rng, sorted(idx.art_tags)[:50], 2)),
+        "oracle_tags": sorted(_some(rng, sorted(idx.oracle_tags)[:50], 2)),
+        "formats": [
+            {"name": f, "legal": rng.choice([True, False])}
+            for f in _some(rng, ["commander", "modern", "pauper"])
+        ],
+        "sort": {
+            "by": rng.choice(["edhrec", "name", "cmc"]),
+            "direction": rng.choice(["asc", "desc"]),
+        },
+    }
+    for field in _some(rng, NUMERIC, 3):
+        data[field] = {"op": rng.choice(OPS), "value": rng.randint(0, 20)}
+    for field, pool in CATEGORICAL.items():
+        data[field] = _some(rng, pool, 1)
+    if rng.random() < 0.6:
+        data["colors"] = {
+            "mode": rng.choice(["identity_only", "card_color"]),
+            "set": sorted(_some(rng, "WUBRG", 3) or ["G"], key="WUBRG".index),
+            "strict": rng.choice([True, False]),
+        }
+    if rng.random() < 0.5:
+        op = rng.choice([">=", ">", "<", "<=", "="])
+        date = rng.choice(["2021-01-01", "2019-06-15"])
+        data["release_date"] = {"op": op, "date": date}
+    return QueryIR.model_validate(data)
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rng = random.Random(int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+    for i in range(n):
+        ir = random_ir(rng)
+        query, _, _ = compile_to_scryfall(ir)
+        back = decompile_scryfall(query)
+        if back != ir:
+            print(f"FAIL #{i}: {query}")
+            print(f"  ir:   {ir.model_dump(exclude_defaults=True)}")
+            print(f"  back: {back and back.model_dump(exclude_defaults=True)}")
+            return 1
+    print(f"{n} random IRs round-tripped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
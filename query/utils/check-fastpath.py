@@ -0,0 +1,103 @@
+"""Check the rule-based fast-path parser against a seeded corpus.
+
+Run from the query/ directory: ``OPENAI_API_KEY=x python utils/check-fastpath.py``.
+Corpus = the LLM few-shot examples (expected IR, or fall-through when the
+example needs the LLM) plus formulaic queries seen in traffic. Exits non-zero
+if the fast path disagrees with any expectation.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models import QueryIR  # noqa: E402
+from app.services.fastpath import fast_parse  # noqa: E402
+from app.services.few_shot_examples import FEW_SHOT  # noqa: E402
+from app.services.normalize import canonicalize  # noqa: E402
+
+# (input, expected IR dict or None for "must fall through to the LLM")
+EXTRA = [
+    (
+        "Mono-White Angels cmc <= 5, legal in commander",
+        FEW_SHOT[0]["ir"],
+    ),
+    (
+        "izzet instants cmc 2 or less rare after 2019",
+        {
+            "entity": {"card_types": ["instant"]},
+            "mana_value": {"op": "<=", "value": 2},
+            "colors": {"mode": "identity_only", "set": ["U", "R"]},
+            "release_date": {"op": ">=", "date": "2020-01-01"},
+            "rarities": ["rare"],
+        },
+    ),
+    (
+        "legendary dragons mv>=6 edh legal",
+        {
+            "entity": {
+                "card_types": ["creature"],
+                "subtypes": ["dragon"],
+                "supertypes": ["legendary"],
+            },
+            "mana_value": {"op": ">=", "value": 6},
+            "formats": [{"name": "commander", "legal": True}],
+        },
+    ),
+    (
+        "goblins set m21",
+        {
+            "entity": {"card_types": ["creature"], "subtypes": ["goblin"]},
+            "set_codes": ["m21"],
+        },
+    ),
+    (
+        "mythic rare dragons",
+        {
+            "entity": {"card_types": ["creature"], "subtypes": ["dragon"]},
+            "rarities": ["mythic"],
+        },
+    ),
+    ("set of angels", None),
+    ("elves that make mana", None),
+    ("red burn spells", None),
+    ("creatures pow>3 pow<5", None),
+]
+
+
+def _expected_for_few_shot(ex: dict) -> dict | None:
+    # Few-shot IRs that use free text or tags can't be produced by rules
+    ir = ex["ir"]
+    if (
+        ir["entity"].get("oracle_text_contains")
+        or ir.get("art_tags")
+        or ir.get("oracle_tags")
+    ):
+        return None
+    return ex["ir"]
+
+
+def main() -> int:
+    corpus = [(ex["input"], _expected_for_few_shot(ex)) for ex in FEW_SHOT] + EXTRA
+    failures = 0
+    for text, expected in corpus:
+        got = fast_parse(canonicalize(text))
+        want = None if expected is None else QueryIR.model_validate(expected)
+        # Few-shot IRs carry an empty colors object where the fast path omits it
+        if got is not None and want is not None and want.colors and not want.colors.set:
+            want.colors = None
+        ok = got == want
+        failures += not ok
+        print(f"{'ok ' if ok else 'FAIL'} {text!r}")
+        if not ok:
+            print(f"     expected: {want and want.model_dump(exclude_defaults=True)}")
+            print(f"     got:      {got and got.model_dump(exclude_defaults=True)}")
+    hits = sum(1 for text, _ in corpus if fast_parse(canonicalize(text)) is not None)
+    print(
+        f"\n{len(corpus) - failures}/{len(corpus)} passed; fast-path coverage {hits}/{len(corpus)}"
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
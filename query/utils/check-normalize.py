@@ -0,0 +1,60 @@
+"""Check ``normalize.canonicalize`` against expected canonical forms.
+
+Run from the query/ directory: ``python utils/check-normalize.py``. Covers
+spelling variants that must share a cache key and word orders that must
+not be merged (atoms separated by ``or``/``not``/free text). Exits non-zero
+on any mismatch.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.normalize import canonicalize  # noqa: E402
+
+# (input, expected canonical text)
+CASES = [
+    (
+        "Mono-White Angels cmc <= 5, legal in commander",
+        "mono white angels mv<=5 legal in commander",
+    ),
+    ("mono white angels mv<=5 legal in commander.", None),
+    ("Goblins power ≥ 3 toughness<2", "goblins pow>=3 tou<2"),
+    ("goblins tou<2 pow>=3", "goblins pow>=3 tou<2"),
+    ("released after 2021-01-01", "released after 2021-01-01"),
+    # Atoms keep their place relative to connectives and free words
+    ("angels mv<=2 or demons mv>=6", "angels mv<=2 or demons mv>=6"),
+    ("pow>3 or tou>3 elves", "pow>3 or tou>3 elves"),
+    ("dragons not mv>=7 pow>5", "dragons not mv>=7 pow>5"),
+    ("dragons pow>5 not mv>=7", "dragons pow>5 not mv>=7"),
+    ("(pow>3 or tou>3) elves", "(pow>3 or tou>3) elves"),
+    ("(mv<2 tou<2) pow>3", "(mv<2 tou<2) pow>3"),
+    # Runs touching a connective or negation keep their order
+    ("dragons not pow>5 mv>=7", "dragons not pow>5 mv>=7"),
+    ("angels without tou>3 mv<2", "angels without tou>3 mv<2"),
+    ("tou>3 pow>3 or mv<2", "tou>3 pow>3 or mv<2"),
+    ("goblins pow>3 mv<2 or elves", "goblins pow>3 mv<2 or elves"),
+    ("goblins pow>3 mv<2 legal in modern", "goblins mv<2 pow>3 legal in modern"),
+]
+
+
+def main() -> int:
+    failures = 0
+    previous = None
+    for text, expected in CASES:
+        # None: same canonical form as the previous case
+        want = previous if expected is None else expected
+        got = canonicalize(text)
+        ok = got == want
+        failures += not ok
+        print(f"{'ok ' if ok else 'FAIL'} {text!r} -> {got!r}")
+        if not ok:
+            print(f"     expected: {want!r}")
+        previous = want
+    print(f"\n{len(CASES) - failures}/{len(CASES)} passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Local stand-in for the OpenAI Responses API, for offline benchmarking.
+
+Point the query service at it with ``OPENAI_BASE_URL=http://localhost:8099/v1``
+(any ``OPENAI_API_KEY`` value works), then run from the query/ directory:
+
+    python utils/mock-openai.py --port 8099
+
+Behaviour is tuned with environment variables:
+
+| Name | Default | Description |
+|------|---------|-------------|
+| MOCK_LATENCY_MS | 800 | Median response latency |
+| MOCK_LATENCY_SIGMA | 0.5 | Log-normal spread of latency (0 = fixed) |
+| MOCK_ERROR_RATE | 0.0 | Fraction of requests answered with HTTP 500 |
+| MOCK_RATE_LIMIT_RATE | 0.0 | Fraction of requests answered with HTTP 429 |
+| MOCK_CANNED | — | JSON file of ``{"input text": {IR...}}`` canned outputs |
+
+Canned outputs are looked up by the prompt's final ``Input:`` line; unknown
+inputs fall back to the few-shot example pool, then the rule-based partial parse,
+then an empty IR. ``GET /stats`` returns request/error counters.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+from app.models import QueryIR  # noqa: E402
+from app.services.fastpath import fast_parse_partial  # noqa: E402
+from app.services.few_shot_examples import EXAMPLE_POOL  # noqa: E402
+from app.services.normalize import canonicalize  # noqa: E402
+
+LATENCY_MS = float(os.getenv("MOCK_LATENCY_MS", "800"))
+LATENCY_SIGMA = float(os.getenv("MOCK_LATENCY_SIGMA", "0.5"))
+ERROR_RATE = float(os.getenv("MOCK_ERROR_RATE", "0"))
+RATE_LIMIT_RATE = float(os.getenv("MOCK_RATE_LIMIT_RATE", "0"))
+
+CANNED: dict[str, dict] = {canonicalize(ex["input"]): ex["ir"] for ex in EXAMPLE_POOL}
+if os.getenv("MOCK_CANNED"):
+    raw = json.loads(Path(os.environ["MOCK_CANNED"]).read_text(encoding="utf-8"))
+    CANNED.update({canonicalize(k): v for k, v in raw.items()})
+
+STATS = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+app = FastAPI(title="Mock OpenAI Responses API")
+
+
+def _latency_secs() -> float:
+    if LATENCY_SIGMA <= 0:
+        return LATENCY_MS / 1000
+    return random.lognormvariate(0, LATENCY_SIGMA) * LATENCY_MS / 1000
+
+
+def _input_text(prompt: str) -> str:
+    marker = "\nInput: "
+    tail = prompt.rsplit(marker, 1)[-1]
+    return tail.split("\nIR JSON:", 1)[0].strip()
+
+
+def _ir_for(text: str) -> dict:
+    canon = canonicalize(text)
+    if canon in CANNED:
+        return CANNED[canon]
+    ir = fast_parse_partial(canon) or QueryIR()
+    return ir.model_dump(mode="json")
+
+
+def _prompt_of(body: dict) -> str:
+    items = body.get("input", "")
+    if isinstance(items, str):
+        return items
+    parts = []
+    for item in items:
+        content = item.get("content", "")
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.extend(c.get("text", "") for c in content if isinstance(c, dict))
+    return "\n".join(parts)
+
+
+@app.post("/v1/responses")
+async def responses(request: Request):
+    STATS["requests"] += 1
+    body = await request.json()
+    await asyncio.sleep(_latency_secs())
+    roll = random.random()
+    if roll < ERROR_RATE:
+        STATS["errors"] += 1
+        return JSONResponse(
+            status_code=500, content={"error": {"message": "mock server error"}}
+        )
+    if roll < ERROR_RATE + RATE_LIMIT_RATE:
+        STATS["rate_limited"] += 1
+        return JSONResponse(
+            status_code=429, content={"error": {"message": "mock rate limit"}}
+        )
+    prompt = _prompt_of(body)
+    text = json.dumps(_ir_for(_input_text(prompt)))
+    input_tokens = max(1, len(prompt) // 4)
+    output_tokens = max(1, len(text) // 4)
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": body.get("model", "mock"),
+        "status": "completed",
+        "output": [
+            {
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex}",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": input_tokens,
+            # Static prompt prefix is what a provider-side prefix cache would hit
+            "input_tokens_details": {"cached_tokens": input_tokens // 2},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+        },
+    }
+
+
+@app.get("/stats")
+async def stats():
+    return STATS
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
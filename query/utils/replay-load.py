@@ -0,0 +1,137 @@
+"""Replay recorded NL query traffic against the query service at a target RPS.
+
+Run from the query/ directory:
+
+    python utils/replay-load.py utils/sample-traffic.jsonl --rps 20 --duration 30
+
+The traffic file is JSONL with one ``{"text": "..."}`` object per line (other
+keys are ignored); lines are replayed in order and wrapped around until the
+duration is over. Requests are issued open-loop (on schedule, regardless of
+outstanding responses) so service slowdowns show up as latency, not as a
+lower offered rate.
+
+Reports throughput, latency percentiles, the cache-hit ratio and LLM call
+count (both from the service's own /metrics, diffed across the run).
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+_METRIC_RE = re.compile(r"^(?P<name>[a-z_]+)(?:\{(?P<labels>[^}]*)\})? (?P<value>\S+)$")
+
+
+def load_texts(path: Path) -> list[str]:
+    texts = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line:
+            text = json.loads(line).get("text")
+            if text:
+                texts.append(text)
+    if not texts:
+        sys.exit(f"no texts found in {path}")
+    return texts
+
+
+async def scrape(client: httpx.AsyncClient) -> Counter:
+    """Sum of parse request counts by cache_state, plus LLM attempt count."""
+    out: Counter = Counter()
+    body = (await client.get("/metrics")).text
+    for line in body.splitlines():
+        m = _METRIC_RE.match(line)
+        if not m:
+            continue
+        name, labels = m.group("name"), m.group("labels") or ""
+        value = float(m.group("value"))
+        if name == "grimoire_query_parse_requests_total":
+            state = re.search(r'cache_state="([^"]*)"', labels)
+            out[f"state:{state.group(1) if state else ''}"] += value
+        elif name == "grimoire_query_llm_parse_attempts_total":
+            out["llm_calls"] += value
+    return out
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def run(args) -> int:
+    texts = load_texts(Path(args.traffic))
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    async with httpx.AsyncClient(
+        base_url=args.url,
+        timeout=args.timeout,
+        limits=httpx.Limits(max_connections=args.max_connections),
+    ) as client:
+        before = await scrape(client)
+
+        async def one(text: str):
+            t0 = time.perf_counter()
+            try:
+                r = await client.post("/nlq/parse", json={"text": text})
+                statuses[r.status_code] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+                return
+            latencies.append(time.perf_counter() - t0)
+
+        total = int(args.rps * args.duration)
+        interval = 1 / args.rps
+        start = time.perf_counter()
+        tasks = []
+        for i in range(total):
+            delay = start + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(texts[i % len(texts)])))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        after = await scrape(client)
+
+    diff = Counter({k: after[k] - before[k] for k in after})
+    served = sum(v for k, v in diff.items() if k.startswith("state:"))
+    misses = diff["state:miss"]
+    ok = statuses.get(200, 0)
+    print(f"requests:    {total} in {elapsed:.1f}s (target {args.rps} rps)")
+    print(f"throughput:  {ok / elapsed:.1f} ok/s")
+    print(f"status:      {dict(statuses)}")
+    print(
+        "latency ms:  "
+        f"p50={percentile(latencies, 0.50) * 1000:.1f} "
+        f"p95={percentile(latencies, 0.95) * 1000:.1f} "
+        f"p99={percentile(latencies, 0.99) * 1000:.1f}"
+    )
+    if served:
+        states = {
+            k[6:]: int(v) for k, v in diff.items() if k.startswith("state:") and v
+        }
+        print(f"cache hits:  {(served - misses) / served:.1%} {states}")
+    print(f"llm calls:   {int(diff['llm_calls'])}")
+    return 0 if ok == total else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("traffic", help="JSONL file of {'text': ...} requests")
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--rps", type=float, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--max-connections", type=int, default=200)
+    return asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())